@@ -0,0 +1,59 @@
+"""Compare per-action sink writes with buffered bulk writes."""
+
+import time
+
+import pytest
+
+from fluidstate import Buffer, StateChart
+from fluidstate.fleet import Fleet
+
+pytest.importorskip('pytest_benchmark')
+
+# simulated round-trip of one call to the sink
+LATENCY = 0.00001
+
+
+def sink(rows):
+    time.sleep(LATENCY)
+
+
+def get_chart(buffered):
+    action = {'content': 'row', 'buffer': 'rows'} if buffered else 'write'
+
+    class Session(StateChart):
+        rows = Buffer(sink)
+        __statechart__ = {
+            'initial': 'idle',
+            'states': [
+                {
+                    'name': 'idle',
+                    'transitions': [{'event': 'toggle', 'target': 'active'}],
+                },
+                {
+                    'name': 'active',
+                    'transitions': [{'event': 'toggle', 'target': 'idle'}],
+                    'on_entry': action,
+                },
+            ],
+        }
+
+        def row(self):
+            return id(self)
+
+        def write(self):
+            sink([id(self)])
+
+    return Session
+
+
+@pytest.mark.parametrize('buffered', [False, True])
+def test_broadcast(benchmark, buffered):
+    chart = get_chart(buffered)
+    fleet = Fleet(chart)
+    fleet.create(1_000)
+
+    def toggle():
+        fleet.broadcast('toggle')
+        fleet.broadcast('toggle')
+
+    benchmark(toggle)
@@ -0,0 +1,37 @@
+"""Compare bulk machine creation against constructing in a loop."""
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+COUNT = 100_000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def test_naive_loop(benchmark):
+    benchmark(lambda: [Switch() for _ in range(COUNT)])
+
+
+def test_bulk_create(benchmark):
+    benchmark(Switch.bulk_create, COUNT)
+
+
+def test_bulk_create_without_entry(benchmark):
+    benchmark(Switch.bulk_create, COUNT, run_entry=False)
@@ -0,0 +1,59 @@
+"""Compare cloning a machine for speculation against deep copying it."""
+
+import copy
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+
+class Account(StateChart):
+    __statechart__ = {
+        'initial': 'open',
+        'states': [
+            {
+                'name': 'open',
+                'transitions': [
+                    {'event': 'freeze', 'target': 'frozen'},
+                    {'event': 'close', 'target': 'closed'},
+                ],
+            },
+            {
+                'name': 'frozen',
+                'transitions': [{'event': 'thaw', 'target': 'open'}],
+            },
+            {'name': 'closed', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.history = list(range(1000))
+        self.limits = {str(x): x for x in range(100)}
+        self.balance = 0
+        super().__init__()
+
+
+def speculate(machine):
+    machine.trigger('freeze')
+    machine.trigger('thaw')
+    return machine.state
+
+
+def test_deepcopy(benchmark):
+    account = Account()
+    # states are shared by the copies like the chart they belong to
+    memo = {id(x): x for x in tuple(Account.main)}
+    benchmark(lambda: speculate(copy.deepcopy(account, dict(memo))))
+
+
+def test_clone(benchmark):
+    account = Account()
+
+    def run():
+        clone = account.clone()
+        speculate(clone)
+        clone.discard()
+
+    benchmark(run)
@@ -0,0 +1,44 @@
+"""Compare dispatching bursts of duplicate events with coalescing them."""
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+BURST = 100
+
+
+def get_chart(coalesce):
+    class Sensor(StateChart):
+        __coalesce__ = {'tick': 'last'} if coalesce else {}
+        __statechart__ = {
+            'initial': 'watching',
+            'states': [
+                {
+                    'name': 'watching',
+                    'transitions': [
+                        {'event': 'tick', 'target': '', 'action': 'record'},
+                        {'event': 'stop', 'target': 'stopped'},
+                    ],
+                },
+                {'name': 'stopped', 'type': 'final'},
+            ],
+        }
+
+        def record(self, value=None):
+            self.value = value
+
+    return Sensor
+
+
+@pytest.mark.parametrize('coalesce', [False, True])
+def test_burst(benchmark, coalesce):
+    machine = get_chart(coalesce)()
+
+    def burst():
+        for n in range(BURST):
+            machine.post('tick', value=n)
+        machine.process()
+
+    benchmark(burst)
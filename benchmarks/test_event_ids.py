@@ -0,0 +1,35 @@
+"""Compare dispatching events by name against interned event ids."""
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+COUNT = 10_000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def test_event_names(benchmark):
+    switch = Switch()
+    benchmark(switch.trigger_many, ['toggle'] * COUNT)
+
+
+def test_event_ids(benchmark):
+    switch = Switch()
+    benchmark(switch.trigger_many, [Switch.event_ids['toggle']] * COUNT)
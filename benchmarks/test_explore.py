@@ -0,0 +1,55 @@
+"""Compare table exploration against searching with machine instances."""
+
+from collections import deque
+
+import pytest
+
+from fluidstate import Result, StateChart
+from fluidstate.explore import Explorer
+
+pytest.importorskip('pytest_benchmark')
+
+COUNT = 1000
+
+
+class Ring(StateChart):
+    __statechart__ = {
+        'initial': 's0',
+        'states': [
+            {
+                'name': f"s{x}",
+                'transitions': [
+                    {'event': 'next', 'target': f"s{(x + 1) % COUNT}"},
+                    {'event': 'skip', 'target': f"s{(x + 7) % COUNT}"},
+                    {'event': 'back', 'target': f"s{(x - 1) % COUNT}"},
+                ],
+            }
+            for x in range(COUNT)
+        ],
+    }
+
+
+def search(chart):
+    # breadth-first search cloning machines to try each event
+    start = chart()
+    visited = {id(start.state)}
+    frontier = deque([start])
+    while frontier:
+        machine = frontier.popleft()
+        for event in chart.events:
+            candidate = machine.clone()
+            if candidate.try_trigger(event) != Result.APPLIED:
+                continue
+            if id(candidate.state) not in visited:
+                visited.add(id(candidate.state))
+                frontier.append(candidate)
+    return len(visited)
+
+
+def test_instance_search(benchmark):
+    assert benchmark(search, Ring) == COUNT
+
+
+def test_explorer(benchmark):
+    result = benchmark(lambda: Explorer(Ring).explore())
+    assert result.configurations == COUNT
@@ -0,0 +1,37 @@
+"""Measure replay throughput with and without actions."""
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+EVENTS = ['toggle'] * 1_000_000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def test_fast_forward_without_guards(benchmark):
+    assert benchmark(Switch().fast_forward, EVENTS, False) == len(EVENTS)
+
+
+def test_fast_forward_with_guards(benchmark):
+    assert benchmark(Switch().fast_forward, EVENTS[:100_000]) == 100_000
+
+
+def test_trigger_many(benchmark):
+    benchmark(Switch().trigger_many, EVENTS[:100_000])
@@ -0,0 +1,52 @@
+"""Show broadcast cost follows eligible machines rather than population."""
+
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.fleet import Fleet
+
+pytest.importorskip('pytest_benchmark')
+
+ELIGIBLE = 100
+
+
+class Session(StateChart):
+    __statechart__ = {
+        'initial': 'idle',
+        'states': [
+            {
+                'name': 'idle',
+                'transitions': [{'event': 'connect', 'target': 'active'}],
+            },
+            {
+                'name': 'active',
+                'transitions': [
+                    {'event': 'timeout', 'target': 'active'},
+                    {'event': 'close', 'target': 'idle'},
+                ],
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize('population', [1_000, 10_000, 100_000])
+def test_broadcast(benchmark, population):
+    fleet = Fleet(Session)
+    for _ in range(population):
+        fleet.add(Session())
+    for key in range(ELIGIBLE):
+        fleet[key].trigger('connect')
+    benchmark(fleet.broadcast, 'timeout')
+
+
+@pytest.mark.parametrize('population', [1_000, 10_000])
+def test_naive_loop(benchmark, population):
+    machines = [Session() for _ in range(population)]
+    for machine in machines[:ELIGIBLE]:
+        machine.trigger('connect')
+
+    def broadcast():
+        for machine in machines:
+            machine.try_trigger('timeout')
+
+    benchmark(broadcast)
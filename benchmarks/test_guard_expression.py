@@ -0,0 +1,35 @@
+"""Compare compiled guard expressions against methods and lambdas."""
+
+import pytest
+
+from fluidstate import Guard, StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+
+class Machine(StateChart):
+    __statechart__ = {'states': [{'name': 'idle'}, {'name': 'busy'}]}
+
+    def __init__(self):
+        self.retries = 1
+        super().__init__()
+
+    def can_retry(self):
+        return self.retries < 3
+
+
+def run(guard, machine):
+    for _ in range(1000):
+        guard(machine)
+
+
+def test_method(benchmark):
+    benchmark(run, Guard('can_retry'), Machine())
+
+
+def test_lambda(benchmark):
+    benchmark(run, Guard(lambda x: x.retries < 3), Machine())
+
+
+def test_expression(benchmark):
+    benchmark(run, Guard('retries < 3'), Machine())
@@ -0,0 +1,47 @@
+"""Measure journal write and read throughput."""
+
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.journal import Journal
+
+pytest.importorskip('pytest_benchmark')
+
+COUNT = 1_000_000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+RECORDS = [(x % 1000, 0, float(x), -1) for x in range(COUNT)]
+
+
+def test_write(benchmark, tmp_path):
+    def write():
+        with Journal(str(tmp_path), Switch) as journal:
+            journal.extend(RECORDS)
+
+    benchmark.pedantic(write, rounds=3)
+
+
+def test_read(benchmark, tmp_path):
+    with Journal(str(tmp_path), Switch) as journal:
+        journal.extend(RECORDS)
+
+    def read():
+        return sum(1 for _ in journal.read())
+
+    assert benchmark.pedantic(read, rounds=3) == COUNT
@@ -0,0 +1,45 @@
+"""Show fleet migration cost with a large population."""
+
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.fleet import Fleet
+
+pytest.importorskip('pytest_benchmark')
+
+
+def get_chart(final):
+    class Session(StateChart):
+        __statechart__ = {
+            'initial': 'idle',
+            'states': [
+                {
+                    'name': 'idle',
+                    'transitions': [{'event': 'connect', 'target': 'active'}],
+                },
+                {
+                    'name': 'active',
+                    'transitions': [{'event': 'close', 'target': final}],
+                },
+                {'name': final, 'type': 'final'},
+            ],
+        }
+
+    return Session
+
+
+Old = get_chart('closed')
+New = get_chart('done')
+
+
+@pytest.mark.parametrize('population', [100_000, 1_000_000])
+def test_fleet_migrate(benchmark, population):
+    def setup():
+        fleet = Fleet(Old)
+        fleet.create(population)
+        fleet.broadcast('connect')
+        return (fleet, New), {}
+
+    benchmark.pedantic(
+        lambda fleet, chart: fleet.migrate(chart), setup=setup, rounds=3
+    )
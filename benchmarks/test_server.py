@@ -0,0 +1,75 @@
+"""Show events per second sent to a local server one at a time or pipelined."""
+
+import asyncio
+
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.server import Client, Server
+
+pytest.importorskip('pytest_benchmark')
+
+EVENTS = 1_000
+
+
+class Door(StateChart):
+    __statechart__ = {
+        'initial': 'closed',
+        'states': [
+            {
+                'name': 'closed',
+                'transitions': [{'event': 'toggle', 'target': 'opened'}],
+            },
+            {
+                'name': 'opened',
+                'transitions': [{'event': 'toggle', 'target': 'closed'}],
+            },
+        ],
+    }
+
+
+def record_rate(benchmark):
+    # statistics are not collected when benchmarks are disabled
+    if benchmark.stats:
+        benchmark.extra_info['events/s'] = EVENTS / benchmark.stats['mean']
+
+
+@pytest.fixture
+def client(tmp_path):
+    loop = asyncio.new_event_loop()
+    server = Server(Door)
+    client = Client(str(tmp_path / 'charts.sock'), size=4)
+    loop.run_until_complete(server.start(client.path))
+    loop.run_until_complete(client.connect())
+    for n in range(4):
+        loop.run_until_complete(client.create('Door', str(n)))
+    yield loop, client
+    loop.run_until_complete(client.close())
+    loop.run_until_complete(server.close())
+    loop.close()
+
+
+def test_single(benchmark, client):
+    loop, client = client
+
+    async def send():
+        for _ in range(EVENTS):
+            await client.trigger('Door', '0', 'toggle')
+
+    benchmark(lambda: loop.run_until_complete(send()))
+    record_rate(benchmark)
+
+
+def test_pipelined(benchmark, client):
+    loop, client = client
+
+    async def send():
+        await asyncio.gather(
+            *(
+                client.trigger_many('Door', str(n), ['toggle'] * (EVENTS // 4))
+                for n in range(4)
+            )
+        )
+
+    benchmark(lambda: loop.run_until_complete(send()))
+    record_rate(benchmark)
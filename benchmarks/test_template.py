@@ -0,0 +1,56 @@
+"""Compare embedding a template against rebuilding a sub-chart."""
+
+import pytest
+
+from fluidstate import StateChart, Template
+
+pytest.importorskip('pytest_benchmark')
+
+SIZE = 200
+EMBEDDINGS = 20
+
+
+def settings(name):
+    return {
+        'name': name,
+        'initial': 's0',
+        'states': [
+            {
+                'name': f"s{x}",
+                'transitions': [
+                    {'event': 'next', 'target': f"s{(x + 1) % SIZE}"},
+                    {
+                        'event': 'check',
+                        'target': f"s{x}",
+                        'cond': 'count < 3',
+                    },
+                ],
+            }
+            for x in range(SIZE)
+        ],
+    }
+
+
+def test_rebuild(benchmark):
+    def build():
+        class Chart(StateChart):
+            __statechart__ = {
+                'states': [settings(f"r{x}") for x in range(EMBEDDINGS)]
+            }
+
+    benchmark(build)
+
+
+def test_template(benchmark):
+    template = Template(settings('region'))
+
+    def build():
+        class Chart(StateChart):
+            __statechart__ = {
+                'states': [
+                    {'template': template, 'name': f"r{x}"}
+                    for x in range(EMBEDDINGS)
+                ]
+            }
+
+    benchmark(build)
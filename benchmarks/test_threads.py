@@ -0,0 +1,57 @@
+"""Measure per-thread throughput of machines sharing a chart.
+
+Run on a free-threaded build of CPython to see whether throughput per
+thread holds as threads are added; with the GIL it is expected to drop.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fluidstate import StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+EVENTS = 5_000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def work(_):
+    # each thread drives its own machine and looks up shared states
+    switch = Switch()
+    start = time.perf_counter()
+    for _ in range(EVENTS):
+        switch.trigger('toggle')
+        switch.get_state('on')
+    return EVENTS / (time.perf_counter() - start)
+
+
+@pytest.mark.parametrize('threads', [1, 2, 4, 8])
+def test_threads(benchmark, threads):
+    with ThreadPoolExecutor(threads) as pool:
+
+        def run():
+            return list(pool.map(work, range(threads)))
+
+        rates = benchmark.pedantic(run, rounds=3)
+    benchmark.extra_info['events_per_thread'] = sum(rates) / threads
+    benchmark.extra_info['gil'] = getattr(
+        sys, '_is_gil_enabled', lambda: True
+    )()
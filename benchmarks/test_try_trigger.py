@@ -0,0 +1,51 @@
+"""Compare raising and non-raising dispatch on mostly unmatched events."""
+
+import pytest
+
+from fluidstate import FluidstateException, StateChart
+
+pytest.importorskip('pytest_benchmark')
+
+# one event in ten applies to the current state
+STREAM = (['heartbeat'] * 9 + ['toggle']) * 1000
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def run_trigger(machine):
+    for event in STREAM:
+        try:
+            machine.trigger(event)
+        except FluidstateException:
+            pass
+
+
+def run_try_trigger(machine):
+    for event in STREAM:
+        machine.try_trigger(event)
+
+
+def test_trigger(benchmark):
+    benchmark(run_trigger, Switch())
+
+
+def test_try_trigger(benchmark):
+    benchmark(run_try_trigger, Switch())
+
+
+def test_trigger_many(benchmark):
+    benchmark(Switch().trigger_many, STREAM)
@@ -0,0 +1,58 @@
+"""Compare vectorized replay against fast-forwarding machines."""
+
+import pytest
+
+from fluidstate import StateChart
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pytest_benchmark')
+
+from fluidstate.vector import Vectorizer  # noqa: E402
+
+ENTITIES = 20_000
+EVENTS = 10
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [
+                    {'event': 'toggle', 'target': 'off'},
+                    {'event': 'break', 'target': 'broken'},
+                ],
+            },
+            {'name': 'broken', 'type': 'final'},
+        ],
+    }
+
+
+@pytest.fixture(scope='module')
+def table():
+    generator = np.random.default_rng(1)
+    entities = np.repeat(np.arange(ENTITIES), EVENTS)
+    events = generator.choice([0, 0, 0, 1], size=ENTITIES * EVENTS)
+    return entities, events
+
+
+def test_fast_forward(benchmark, table):
+    entities, events = table
+    logs = events.reshape(ENTITIES, EVENTS).tolist()
+
+    def run():
+        machines = Switch.bulk_create(ENTITIES, run_entry=False)
+        for machine, log in zip(machines, logs):
+            machine.fast_forward(log, guards=False)
+
+    benchmark(run)
+
+
+def test_vectorized(benchmark, table):
+    vectorizer = Vectorizer(Switch)
+    benchmark(vectorizer.replay, *table)
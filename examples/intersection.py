@@ -2,7 +2,7 @@
 
 import time
 
-from fluidstate import Action, State, StateChart, Transition
+from fluidstate import Action, State, StateChart, Template, Transition
 
 
 def get_stoplight(name: str, initial: str = 'red') -> State:
@@ -48,6 +48,9 @@ def get_stoplight(name: str, initial: str = 'red') -> State:
     )
 
 
+stoplight = Template(get_stoplight('stoplight'))
+
+
 class Intersection(StateChart):
     """Provide an object representing an intersection."""
 
@@ -55,8 +58,8 @@ class Intersection(StateChart):
         'name': 'intersection',
         'type': 'parallel',
         'states': [
-            get_stoplight('north_sourth', 'red'),
-            get_stoplight('east_west', 'green'),
+            {'template': stoplight, 'name': 'north_sourth', 'initial': 'red'},
+            {'template': stoplight, 'name': 'east_west', 'initial': 'green'},
         ],
     }
 
@@ -1,7 +1,5 @@
 """Demonstrate a stoplight."""
 
-import time
-
 from fluidstate import StateChart
 
 
@@ -15,33 +13,21 @@ class StopLight(StateChart):
             {
                 'name': 'red',
                 'transitions': [
-                    {
-                        'event': 'turn_green',
-                        'target': 'green',
-                        'action': lambda: time.sleep(3),
-                    }
+                    {'event': 'turn_green', 'target': 'green', 'after': 3},
                 ],
                 'on_entry': lambda: print('Red light!'),
             },
             {
                 'name': 'yellow',
                 'transitions': [
-                    {
-                        'event': 'turn_red',
-                        'target': 'red',
-                        'action': lambda: time.sleep(3),
-                    }
+                    {'event': 'turn_red', 'target': 'red', 'after': 3},
                 ],
                 'on_entry': lambda: print('Yellow light!'),
             },
             {
                 'name': 'green',
                 'transitions': [
-                    {
-                        'event': 'turn_yellow',
-                        'target': 'yellow',
-                        'action': lambda: time.sleep(3),
-                    }
+                    {'event': 'turn_yellow', 'target': 'yellow', 'after': 3},
                 ],
                 'on_entry': lambda: print('Green light!'),
             },
@@ -50,9 +36,5 @@ class StopLight(StateChart):
 
 
 if __name__ == '__main__':
-    import asyncio
     stoplight = StopLight()
-    for x in range(3):
-        stoplight.trigger('turn_green')
-        stoplight.trigger('turn_yellow')
-        stoplight.trigger('turn_red')
+    StopLight.__timers__.run(27)
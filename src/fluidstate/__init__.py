@@ -22,12 +22,23 @@
 
 from __future__ import annotations
 
+import ast
+import copy
+import importlib
 import inspect
 import logging
-from collections import deque
+import threading
+import time
+from collections import OrderedDict, deque
 from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import IntEnum
+from functools import partial
 from itertools import zip_longest
-from typing import Any, Optional, Union
+from typing import Any, NamedTuple, Optional, Union
+
+from .timers import Timer, TimerWheel
 
 __author__ = 'Jesse P. Johnson'
 __author_email__ = 'jpj6652@gmail.com'
@@ -36,25 +47,204 @@ __description__ = 'Compact statechart that can be vendored.'
 __version__ = '1.3.1a0'
 __license__ = 'MIT'
 __copyright__ = 'Copyright 2022 Jesse Johnson.'
-__all__ = ('Action', 'Guard', 'State', 'StateChart', 'Transition')
+__all__ = (
+    'Action',
+    'Background',
+    'Buffer',
+    'Field',
+    'Guard',
+    'GuardCache',
+    'Result',
+    'State',
+    'StateChart',
+    'Template',
+    'Transition',
+)
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
 Content = Union[Callable, str]
+Event = Union[str, int]
+Loader = Union[Callable[[], Iterable[Any]], str]
+
+# serialize loading of lazy substates shared by every machine of a chart
+LOADING = threading.RLock()
 Condition = Union[Content, bool]
 
+SELECTIONS = ('strict', 'first')
+
+# how consecutive posts of a coalescible event are merged
+COALESCING = ('drop', 'last', 'count')
+
+# how a buffer handles a bulk handler failure
+FAILURES = ('raise', 'retain', 'log')
+
+# buffers written during the current batch of each thread
+BATCH = threading.local()
+
+# containers copied for each machine given the same default or attribute
+MUTABLE = (list, dict, set, bytearray)
+
+# extended state shared by a clone rather than copied
+IMMUTABLE = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    tuple,
+    frozenset,
+    range,
+    type,
+)
+
+
+class Result(IntEnum):
+    """Provide outcome of processing an event."""
+
+    APPLIED = 0
+    NO_TRANSITION = 1
+    GUARD_FAILED = 2
+    FORKED = 3
+    FINAL = 4
+
 
 def tuplize(value: Any) -> tuple[Any, ...]:
     """Convert any type into a tuple."""
     return tuple(value) if type(value) in (list, tuple) else (value,)
 
 
+def isolate(value: Any) -> Any:
+    """Return a shallow copy of value unless it is known to be immutable.
+
+    States and machines, and values that cannot be copied such as locks,
+    are returned as is.
+    """
+    if isinstance(value, (*IMMUTABLE, State, StateChart)):
+        return value
+    try:
+        return copy.copy(value)
+    except (TypeError, copy.Error):
+        return value
+
+
+# syntax allowed in guard expressions
+EXPRESSION_NODES = (
+    ast.Expression,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.UnaryOp,
+    ast.Not,
+    ast.USub,
+    ast.UAdd,
+    ast.Compare,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+    ast.In,
+    ast.NotIn,
+    ast.Is,
+    ast.IsNot,
+    ast.Name,
+    ast.Attribute,
+    ast.Constant,
+    ast.Tuple,
+    ast.List,
+    ast.Set,
+    ast.Load,
+)
+
+
+def compile_expression(source: str) -> Callable[[StateChart, dict], Any]:
+    """Compile a guard expression into a function of machine and kwargs.
+
+    Names are read from the event keyword arguments when given, otherwise
+    from attributes of the machine. Only attribute access, comparisons,
+    boolean operators, membership tests and literals are allowed.
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as err:
+        raise InvalidConfig(f"invalid guard expression: {source}") from err
+    for node in ast.walk(tree):
+        if not isinstance(node, EXPRESSION_NODES):
+            raise InvalidConfig(
+                f"unsupported syntax in guard expression: {source}"
+            )
+        if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            raise InvalidConfig(
+                f"private attribute in guard expression: {source}"
+            )
+        if isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise InvalidConfig(f"private name in guard expression: {source}")
+
+    class Resolve(ast.NodeTransformer):
+        # read names from kwargs falling back to the machine
+        def visit_Name(  # pylint: disable=invalid-name
+            self, node: ast.Name
+        ) -> ast.AST:
+            return ast.IfExp(
+                test=ast.Compare(
+                    left=ast.Constant(node.id),
+                    ops=[ast.In()],
+                    comparators=[ast.Name('_kwargs', ast.Load())],
+                ),
+                body=ast.Subscript(
+                    value=ast.Name('_kwargs', ast.Load()),
+                    slice=ast.Constant(node.id),
+                    ctx=ast.Load(),
+                ),
+                orelse=ast.Attribute(
+                    value=ast.Name('_machine', ast.Load()),
+                    attr=node.id,
+                    ctx=ast.Load(),
+                ),
+            )
+
+    body = Resolve().visit(tree.body)
+    function = ast.Expression(
+        ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg('_machine'), ast.arg('_kwargs')],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=body,
+        )
+    )
+    ast.fix_missing_locations(function)
+    code = compile(function, f"<guard {source}>", 'eval')
+    return eval(code, {'__builtins__': {}})  # pylint: disable=eval-used
+
+
 class Action:
-    """Encapsulate executable content."""
+    """Encapsulate executable content.
 
-    def __init__(self, content: Content) -> None:
+    A buffered action appends the value its content returns to ``buffer``,
+    given as a buffer or the name of a machine attribute holding one,
+    instead of producing the side effect itself. A background action is
+    submitted to ``background``, or to the ``__background__`` of the
+    machine when True, and returns without waiting for it to run.
+    """
+
+    def __init__(
+        self,
+        content: Content,
+        buffer: Optional[Union[Buffer, str]] = None,
+        background: Union[Background, bool] = False,
+    ) -> None:
         self.content = content
+        self.buffer = buffer
+        self.background = background
 
     def __call__(
         self,
@@ -69,11 +259,40 @@ class Action:
         else:
             content = getattr(machine, self.content)
         parameters = inspect.signature(content).parameters
-        if len(parameters.keys()) != 0:
-            if kwargs and 'kwargs' not in parameters:
-                kwargs = {k: v for k, v in kwargs.items() if k in parameters}
-            return content(*args, **kwargs)
-        return content()
+        if len(parameters.keys()) == 0:
+            args, kwargs = (), {}
+        elif kwargs and 'kwargs' not in parameters:
+            kwargs = {k: v for k, v in kwargs.items() if k in parameters}
+        if self.background is not False:
+            background = (
+                machine.__background__
+                if self.background is True
+                else self.background
+            )
+            background.submit(
+                machine, partial(self.__run, machine, content, args, kwargs)
+            )
+            return None
+        return self.__run(machine, content, args, kwargs)
+
+    def __run(
+        self,
+        machine: StateChart,
+        content: Callable,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        result = content(*args, **kwargs)
+        if self.buffer is None:
+            return result
+        buffer = (
+            getattr(machine, self.buffer)
+            if isinstance(self.buffer, str)
+            else self.buffer
+        )
+        if result is not None:
+            buffer.append(result)
+        return None
 
     @classmethod
     def create(
@@ -89,14 +308,231 @@ class Action:
         raise InvalidConfig('could not find a valid configuration for action')
 
 
+class FlushInfo(NamedTuple):
+    """Provide the size, latency in seconds and outcome of a flush."""
+
+    size: int
+    latency: float
+    failed: bool
+
+
+class Buffer:
+    """Collect values of buffered actions for a bulk handler.
+
+    Values appended during a batch are passed to ``handler`` as one list
+    when the batch ends. ``StateChart.trigger_many`` and fleet broadcasts
+    run as batches, and ``batch`` opens one explicitly. Outside of a batch
+    values are flushed as they are appended.
+
+    When the handler raises, ``failure`` decides whether the values are
+    dropped and the error raised, kept for the next flush and the error
+    raised, or dropped and the error logged. The last ``history`` flushes
+    are kept for inspection.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[Any]], Any],
+        failure: str = 'raise',
+        history: int = 128,
+    ) -> None:
+        if failure not in FAILURES:
+            raise InvalidConfig(
+                f"failure must be one of {', '.join(FAILURES)}"
+            )
+        self.handler = handler
+        self.failure = failure
+        self.history: deque[FlushInfo] = deque(maxlen=history)
+        self.__values: list[Any] = []
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def append(self, value: Any) -> None:
+        """Add value to the pending bulk call."""
+        with self.__lock:
+            self.__values.append(value)
+        pending = getattr(BATCH, 'buffers', None)
+        if pending is None:
+            self.flush()
+        elif self not in pending:
+            pending.append(self)
+
+    def flush(self) -> Optional[FlushInfo]:
+        """Pass pending values to the handler in one call."""
+        with self.__lock:
+            values, self.__values = self.__values, []
+        if not values:
+            return None
+        start = time.perf_counter()
+        try:
+            self.handler(values)
+        except Exception as err:
+            info = FlushInfo(len(values), time.perf_counter() - start, True)
+            self.history.append(info)
+            if self.failure == 'retain':
+                with self.__lock:
+                    self.__values[:0] = values
+            if self.failure == 'log':
+                log.error(
+                    'buffer flush of %d values failed: %s', len(values), err
+                )
+                return info
+            raise
+        info = FlushInfo(len(values), time.perf_counter() - start, False)
+        self.history.append(info)
+        log.info('flushed %d buffered values', len(values))
+        return info
+
+    @staticmethod
+    @contextmanager
+    def batch() -> Iterator[None]:
+        """Defer flushes of buffers written within the block to its end."""
+        if getattr(BATCH, 'buffers', None) is not None:
+            # nested batches are flushed by the outermost one
+            yield
+            return
+        BATCH.buffers = []
+        try:
+            yield
+        finally:
+            buffers = BATCH.buffers
+            BATCH.buffers = None
+            # every buffer is flushed before the first failure is raised
+            error: Optional[Exception] = None
+            for buffer in buffers:
+                try:
+                    buffer.flush()
+                except Exception as err:  # pylint: disable=broad-except
+                    error = error or err
+            if error is not None:
+                raise error
+
+
+class Background:
+    """Run background actions on an executor in order for each machine.
+
+    Actions of a machine run one at a time in the order they were
+    submitted, while actions of different machines run concurrently. At
+    most ``maxsize`` actions may be pending, after which submitting blocks
+    until one completes. Errors are passed to ``on_error`` with the machine
+    or logged. A thread pool of ``workers`` threads is created on first use
+    unless an executor is given.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        maxsize: int = 1024,
+        on_error: Optional[Callable[[StateChart, Exception], Any]] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        if maxsize < 1:
+            raise InvalidConfig('background queue must hold an action')
+        self.executor = executor
+        self.maxsize = maxsize
+        self.on_error = on_error
+        self.workers = workers
+        self.__slots = threading.BoundedSemaphore(maxsize)
+        self.__queues: dict[int, deque[Callable[[], Any]]] = {}
+        self.__pending = 0
+        self.__idle = threading.Condition()
+
+    def __len__(self) -> int:
+        return self.__pending
+
+    def submit(self, machine: StateChart, call: Callable[[], Any]) -> None:
+        """Queue call after earlier calls submitted for machine."""
+        self.__slots.acquire()
+        with self.__idle:
+            self.__pending += 1
+            queue = self.__queues.get(id(machine))
+            if queue is not None:
+                # a worker is already running calls of this machine
+                queue.append(call)
+                return
+            self.__queues[id(machine)] = deque()
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='fluidstate'
+                )
+        try:
+            self.executor.submit(self.__run, machine, call)
+        except Exception:
+            with self.__idle:
+                self.__pending -= 1
+                del self.__queues[id(machine)]
+                self.__idle.notify_all()
+            self.__slots.release()
+            raise
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for pending calls and return whether all completed."""
+        with self.__idle:
+            return self.__idle.wait_for(
+                lambda: not self.__pending, timeout=timeout
+            )
+
+    def shutdown(self) -> None:
+        """Wait for pending calls and release the executor."""
+        self.drain()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __run(self, machine: StateChart, call: Callable[[], Any]) -> None:
+        # run calls of machine until its queue is empty
+        while True:
+            try:
+                call()
+            except Exception as err:  # pylint: disable=broad-except
+                try:
+                    if self.on_error is None:
+                        log.error('background action failed: %s', err)
+                    else:
+                        self.on_error(machine, err)
+                except Exception as error:  # pylint: disable=broad-except
+                    log.error('background error callback failed: %s', error)
+            self.__slots.release()
+            with self.__idle:
+                self.__pending -= 1
+                queue = self.__queues[id(machine)]
+                if not queue:
+                    del self.__queues[id(machine)]
+                    self.__idle.notify_all()
+                    return
+                call = queue.popleft()
+
+
 class Guard:
     """Control the flow of transitions to states with conditions."""
 
-    def __init__(self, condition: Condition) -> None:
+    def __init__(
+        self,
+        condition: Condition,
+        pure: bool = False,
+        depends: Optional[Iterable[str]] = None,
+    ) -> None:
         self.condition = condition
+        self.pure = pure
+        self.depends = tuple(depends or ())
+        # strings that are not names are compiled as expressions
+        self.expression = (
+            compile_expression(condition)
+            if isinstance(condition, str) and not condition.isidentifier()
+            else None
+        )
+        try:
+            hash(condition)
+            self.key: Any = condition
+        except TypeError:
+            self.key = self
 
     def __call__(self, machine: StateChart, *args: Any, **kwargs: Any) -> bool:
         """Evaluate condition."""
+        if self.expression is not None:
+            return bool(self.expression(machine, kwargs))
         if callable(self.condition):
             return self.condition(machine, *args, **kwargs)
         if isinstance(self.condition, str):
@@ -115,6 +551,23 @@ class Guard:
             return self.condition
         return False
 
+    def check(
+        self,
+        machine: StateChart,
+        memo: dict[Any, bool],
+        *args: Any,
+        **kwargs: Any,
+    ) -> bool:
+        """Evaluate condition at most once for the dispatch owning memo."""
+        if self.key in memo:
+            return memo[self.key]
+        if self.pure:
+            result = machine.guard_cache(self, machine, *args, **kwargs)
+        else:
+            result = self(machine, *args, **kwargs)
+        memo[self.key] = result
+        return result
+
     @classmethod
     def create(
         cls, settings: Union[Guard, Callable, dict[str, Any], bool]
@@ -131,6 +584,120 @@ class Guard:
         raise InvalidConfig('could not find a valid configuration for guard')
 
 
+class Field(NamedTuple):
+    """Declare a typed extended state attribute of a statechart."""
+
+    name: str
+    type: type
+    default: Any = None
+
+    @classmethod
+    def create(cls, settings: Union[Field, tuple, dict[str, Any]]) -> Field:
+        """Create field from configuration settings."""
+        if isinstance(settings, cls):
+            field = settings
+        elif isinstance(settings, tuple):
+            field = cls(*settings)
+        elif isinstance(settings, dict):
+            field = cls(**settings)
+        else:
+            raise InvalidConfig(
+                'could not find a valid configuration for field'
+            )
+        if not field.name.isidentifier() or field.name.startswith('_'):
+            raise InvalidConfig(f"invalid field name: {field.name!r}")
+        # is_ attributes are answered by the active state check
+        if field.name.startswith('is_'):
+            raise InvalidConfig(
+                f"field name shadows a state check: {field.name!r}"
+            )
+        if field.default is not None and not isinstance(
+            field.default, field.type
+        ):
+            raise InvalidConfig(
+                f"default of field {field.name} must be {field.type.__name__}"
+            )
+        return field
+
+    def initial(self) -> Any:
+        """Return a default value for a new machine."""
+        if type(self.default) in MUTABLE:
+            return copy.copy(self.default)
+        return self.default
+
+
+class CacheInfo(NamedTuple):
+    """Provide statistics for a guard cache."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class GuardCache:
+    """Cache results of pure guards across events with LRU eviction.
+
+    Results are keyed by the guard, the values of the attributes the guard
+    declares in ``depends`` and the event parameters. Guards whose key is
+    not hashable are evaluated without caching. The cache is shared by
+    every machine of a chart, so updates are made under a lock while
+    guards are evaluated outside of it.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__results: OrderedDict[Any, Any] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__results)
+
+    def __call__(
+        self, guard: Guard, machine: StateChart, *args: Any, **kwargs: Any
+    ) -> bool:
+        """Return cached guard result or evaluate and store it."""
+        try:
+            key = (
+                guard.key,
+                tuple(getattr(machine, x) for x in guard.depends),
+                args,
+                tuple(sorted(kwargs.items())),
+            )
+            result = self.__results.get(key, self)
+        except TypeError:
+            return guard(machine, *args, **kwargs)
+        if result is not self:
+            with self.__lock:
+                if key in self.__results:
+                    self.__results.move_to_end(key)
+                self.hits += 1
+            return result
+        result = guard(machine, *args, **kwargs)
+        with self.__lock:
+            self.misses += 1
+            if self.maxsize > 0:
+                self.__results[key] = result
+                if len(self.__results) > self.maxsize:
+                    self.__results.popitem(last=False)
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        """Report cache statistics."""
+        return CacheInfo(
+            self.hits, self.misses, self.maxsize, len(self.__results)
+        )
+
+    def cache_clear(self) -> None:
+        """Clear cached results and statistics."""
+        with self.__lock:
+            self.__results.clear()
+            self.hits = 0
+            self.misses = 0
+
+
 class Transition:
     """Provide transition capability for transitions."""
 
@@ -140,11 +707,13 @@ class Transition:
         target: str,
         action: Optional[Iterable[Action]] = None,
         cond: Optional[Iterable[Guard]] = None,
+        after: Optional[float] = None,
     ) -> None:
         self.event = event
         self.target = target
-        self.action = action or []
-        self.cond = cond or []
+        self.action = tuple(action or ())
+        self.cond = tuple(cond or ())
+        self.after = after
 
     def __repr__(self) -> str:
         return repr(f"Transition(event={self.event}, target={self.target})")
@@ -168,15 +737,26 @@ class Transition:
                     if 'cond' in settings
                     else None
                 ),
+                after=settings.get('after'),
             )
         raise InvalidConfig('could not find a valid transition configuration')
 
     def evaluate(self, machine: StateChart, *args: Any, **kwargs: Any) -> bool:
         """Evaluate guard conditions to determine correct transition."""
+        return self.check(machine, {}, *args, **kwargs)
+
+    def check(
+        self,
+        machine: StateChart,
+        memo: dict[Any, bool],
+        *args: Any,
+        **kwargs: Any,
+    ) -> bool:
+        """Evaluate guard conditions sharing results within a dispatch."""
         result = True
         if self.cond:
             for cond in self.cond:
-                result = cond(machine, *args, **kwargs)
+                result = cond.check(machine, memo, *args, **kwargs)
                 if not result:
                     break
         return result
@@ -199,7 +779,7 @@ class Transition:
             machine.state._run_on_entry(machine)
         else:
             macrostep = relpath.split('.')[2 if relpath.endswith('.') else 1 :]
-            while macrostep[0] == '':  # reverse
+            while macrostep and macrostep[0] == '':  # reverse
                 machine.state._run_on_exit(machine)
                 machine.state = machine.active[1]
                 macrostep.pop(0)
@@ -226,10 +806,21 @@ class Transition:
 class State:  # pylint: disable=too-many-instance-attributes
     """Represent state."""
 
+    __slots__ = (
+        'name',
+        '__initial',
+        '__loader',
+        '__on_entry',
+        '__on_exit',
+        '__superstate',
+        '__substates',
+        '__transitions',
+        '__type',
+    )
     __initial: Optional[Content]
+    __loader: Optional[Loader]
     __on_entry: Optional[Iterable[Action]]
     __on_exit: Optional[Iterable[Action]]
-    __queue: deque[State]
     __superstate: Optional[State]
     __substates: tuple[State, ...]
     __transitions: tuple[Transition, ...]
@@ -237,8 +828,8 @@ class State:  # pylint: disable=too-many-instance-attributes
     def __init__(
         self,
         name: str,
-        transitions: Optional[tuple[Transition]] = None,
-        states: Optional[tuple[State]] = None,
+        transitions: Optional[tuple[Transition, ...]] = None,
+        states: Optional[Union[tuple[State, ...], Loader]] = None,
         **kwargs: Any,
     ) -> None:
         if not name.replace('_', '').isalnum():
@@ -247,7 +838,13 @@ class State:  # pylint: disable=too-many-instance-attributes
         self.__superstate: Optional[State] = None
         self.__type = kwargs.get('type')
         self.__initial = kwargs.get('initial')
-        self.__substates = states or ()
+        # substates given by a loader are built when first needed
+        if callable(states) or isinstance(states, str):
+            self.__loader = states
+            self.__substates = ()
+        else:
+            self.__loader = None
+            self.__substates = states or ()
         for state in self.substates:
             state.superstate = self
         self.__transitions = transitions or ()
@@ -269,18 +866,13 @@ class State:  # pylint: disable=too-many-instance-attributes
     def __str__(self) -> str:
         return f"State({self.name})"
 
-    def __iter__(self) -> State:
-        self.__queue = deque([self])
-        return self
-
-    def __next__(self) -> State:
-        # simple breadth-first iteration
-        if self.__queue:
-            x = self.__queue.pop()
-            if isinstance(x, State):
-                self.__queue.extendleft(x.substates)
-            return x
-        raise StopIteration
+    def __iter__(self) -> Iterator[State]:
+        # breadth-first iteration keeping no state on the shared object
+        queue = deque([self])
+        while queue:
+            state = queue.pop()
+            queue.extendleft(state.substates)
+            yield state
 
     def __reversed__(self) -> Iterator[State]:
         target: Optional[State] = self
@@ -290,7 +882,7 @@ class State:  # pylint: disable=too-many-instance-attributes
 
     def __validate_state(self) -> None:
         # TODO: empty statemachine should default to null event
-        if self.type == 'compound':
+        if self.type == 'compound' and self.__loader is None:
             if len(self.__substates) < 2:
                 raise InvalidConfig(
                     'There must be at least two states', self.name
@@ -306,13 +898,19 @@ class State:  # pylint: disable=too-many-instance-attributes
             return settings
         if isinstance(settings, str):
             return cls(settings)
+        if isinstance(settings, Template):
+            return settings.create()
+        if isinstance(settings, dict) and 'template' in settings:
+            return settings['template'].create(
+                settings.get('name'), settings.get('initial')
+            )
         if isinstance(settings, dict):
             return settings.get('factory', cls)(
                 name=settings['name'],
                 initial=settings.get('initial'),
                 type=settings.get('type'),
                 states=(
-                    tuple(map(State.create, settings.pop('states')))
+                    cls.__create_states(settings.pop('states'))
                     if 'states' in settings
                     else None
                 ),
@@ -334,17 +932,30 @@ class State:  # pylint: disable=too-many-instance-attributes
             )
         raise InvalidConfig('could not find a valid state configuration')
 
+    @staticmethod
+    def __create_states(
+        settings: Union[Iterable[Any], Loader]
+    ) -> Union[tuple[State, ...], Loader]:
+        if callable(settings) or isinstance(settings, str):
+            return settings
+        return tuple(map(State.create, settings))
+
     @property
     def initial(self) -> Optional[Content]:
         """Return initial substate if defined."""
         return self.__initial
 
+    @property
+    def loaded(self) -> bool:
+        """Return whether substates declared by a loader are built."""
+        return self.__loader is None
+
     @property
     def type(self) -> str:
         """Return state type."""
         if self.__type:
             return self.__type
-        if self.substates:
+        if self.substates or self.__loader is not None:
             return 'compound'
         return 'atomic'
 
@@ -375,18 +986,64 @@ class State:  # pylint: disable=too-many-instance-attributes
         """Return transitions of this state."""
         return self.__transitions
 
+    def _replicate(
+        self, name: Optional[str] = None, initial: Optional[Content] = None
+    ) -> State:
+        # build a state tree sharing transitions and actions of this one
+        return self.__class__(
+            name=name or self.name,
+            initial=initial or self.__initial,
+            type=self.__type,
+            states=(
+                self.__loader
+                if self.__loader is not None
+                else tuple(x._replicate() for x in self.__substates) or None
+            ),
+            transitions=self.__transitions,
+            on_entry=self.__on_entry,
+            on_exit=self.__on_exit,
+        )
+
+    def _load(self) -> tuple[State, ...]:
+        # build substates declared by a loader once
+        with LOADING:
+            if self.__loader is not None:
+                loader = self.__loader
+                if isinstance(loader, str):
+                    module, _, name = loader.partition(':')
+                    loader = getattr(importlib.import_module(module), name)
+                substates = tuple(
+                    map(State.create, loader() if callable(loader) else loader)
+                )
+                if len(substates) < 2:
+                    raise InvalidConfig(
+                        'There must be at least two states', self.name
+                    )
+                for state in substates:
+                    state.superstate = self
+                self.__substates = substates
+                self.__loader = None
+                log.info('loaded substates of %s', self.name)
+        return self.__substates
+
     def _run_on_entry(self, machine: StateChart) -> None:
+        if self.__loader is not None:
+            machine.__class__._materialize(self)
         for action in self.__on_entry or ():
             action(machine)
             log.info(
                 "executed 'on_entry' state change action for %s", self.name
             )
         for transition in self.transitions:
-            if transition.event == '':
+            if transition.after is not None:
+                machine._schedule(self, transition.event, transition.after)
+        for transition in self.transitions:
+            if transition.event == '' and transition.after is None:
                 machine.trigger(transition.event)
                 break
 
     def _run_on_exit(self, machine: StateChart) -> None:
+        machine._cancel_timers(self)
         for action in self.__on_exit or ():
             action(machine)
             log.info(
@@ -394,10 +1051,126 @@ class State:  # pylint: disable=too-many-instance-attributes
             )
 
 
+class Template:
+    """Compile a sub-chart once to embed it under several parents.
+
+    Transitions, actions and guards of the template are shared by every
+    embedding, which only creates the slotted states holding them, and
+    their compiled rows are shared as routes are relative. Embed a
+    template in the states of a chart directly or as a dict with
+    ``template`` and optionally ``name`` and ``initial``.
+    """
+
+    def __init__(self, settings: Union[State, dict[str, Any]]) -> None:
+        self.prototype = State.create(settings)
+        if self.prototype.superstate is not None:
+            raise InvalidConfig('template must not belong to a statechart')
+
+    def create(
+        self, name: Optional[str] = None, initial: Optional[Content] = None
+    ) -> State:
+        """Create an embedding of the template."""
+        return self.prototype._replicate(name, initial)
+
+
+class Route(NamedTuple):
+    """Provide states exited and entered when following a transition.
+
+    Routes are relative to the state they are followed from, so every
+    embedding of a template shares them. ``up`` states are exited from the
+    source, then the substates at the indices in ``down`` are entered from
+    the superstate reached. A ``loop`` exits and re-enters the source.
+    """
+
+    up: int
+    down: tuple[int, ...]
+    loop: bool = False
+
+    def exits(self, state: State) -> tuple[State, ...]:
+        """Return the states exited when following the route from state."""
+        if self.loop:
+            return (state,)
+        exits = []
+        for _ in range(self.up):
+            exits.append(state)
+            state = state.superstate or state
+        return tuple(exits)
+
+    def entries(self, state: State) -> tuple[State, ...]:
+        """Return the states entered when following the route from state."""
+        if self.loop:
+            return (state,)
+        for _ in range(self.up):
+            state = state.superstate or state
+        entries = []
+        for index in self.down:
+            state = state.substates[index]
+            entries.append(state)
+        return tuple(entries)
+
+    def target(self, state: State) -> State:
+        """Return the state reached when following the route from state."""
+        if self.loop:
+            return state
+        for _ in range(self.up):
+            state = state.superstate or state
+        for index in self.down:
+            state = state.substates[index]
+        return state
+
+
+class Candidates(NamedTuple):
+    """Provide transitions of a state that may be selected by an event.
+
+    Transitions are kept in document order, from the state outward to its
+    superstates. Candidates that are ``exclusive`` were proven at class
+    creation to never allow more than one transition at a time.
+    """
+
+    transitions: tuple[Transition, ...]
+    exclusive: bool
+    routes: tuple[Optional[Route], ...]
+
+
+class Report(NamedTuple):
+    """Provide findings of the static analysis of a statechart.
+
+    States are identified by their statepath and transitions by the
+    statepath of the source state and their event.
+    """
+
+    unresolved: tuple[tuple[str, str], ...]
+    unreachable: tuple[str, ...]
+    dead_ends: tuple[str, ...]
+    cycles: tuple[tuple[str, ...], ...]
+    ambiguous: tuple[tuple[str, str], ...]
+    conflicts: tuple[tuple[str, str], ...]
+    final: tuple[tuple[str, str], ...]
+
+    @property
+    def ok(self) -> bool:
+        """Return whether the chart is safe for trusted dispatch."""
+        return not (
+            self.unresolved or self.cycles or self.ambiguous or self.final
+        )
+
+
 class MetaStateChart(type):
     """Provide capability to populate configuration for statemachine ."""
 
     main: State
+    guard_cache: GuardCache
+    transition_table: dict[int, dict[str, Candidates]]
+    report: Optional[Report]
+    events: tuple[str, ...]
+    eventless: frozenset[int]
+    final: frozenset[int]
+    jump_table: dict[int, dict[str, Route]]
+    event_ids: dict[str, int]
+    event_table: dict[int, dict[int, Candidates]]
+    lazy: frozenset[int]
+    coalescing: dict[Event, tuple[str, str]]
+    fields: tuple[Field, ...]
 
     def __new__(
         mcs,
@@ -406,7 +1179,21 @@ class MetaStateChart(type):
         attrs: dict[str, Any],
     ) -> MetaStateChart:
         settings = attrs.pop('__statechart__', None)
-        obj = super().__new__(mcs, name, bases, attrs)
+        # declared fields are stored in slots of the machine
+        declared = tuple(map(Field.create, attrs.get('__fields__', ())))
+        if declared:
+            attrs['__slots__'] = tuple(x.name for x in declared)
+        try:
+            obj = super().__new__(mcs, name, bases, attrs)
+        except ValueError as err:
+            raise InvalidConfig(str(err)) from err
+        obj.fields = (
+            tuple(x for y in bases for x in getattr(y, 'fields', ()))
+            + declared
+        )
+        obj.guard_cache = GuardCache(
+            maxsize=getattr(obj, '__guard_cache_size__', 128)
+        )
         if settings:
             obj.main = settings.pop('factory', State)(
                 name=settings.pop('name', 'main'),
@@ -423,13 +1210,429 @@ class MetaStateChart(type):
                     else None
                 ),
             )
+        if getattr(obj, '__selection__', 'strict') not in SELECTIONS:
+            raise InvalidConfig(
+                f"selection must be one of {', '.join(SELECTIONS)}"
+            )
+        if hasattr(obj, 'main'):
+            obj.events = ()
+            if getattr(obj, '__trusted__', False):
+                # trusted dispatch relies on routes resolved up front
+                obj._load_all()
+            obj._compile()
+            if (
+                getattr(obj, '__trusted__', False)
+                and obj.report is not None
+                and not obj.report.ok
+            ):
+                raise InvalidConfig(
+                    'statechart failed analysis required for trusted dispatch',
+                    obj.report,
+                )
+        else:
+            obj.events = ()
+            obj.event_ids = {}
+            obj.transition_table = {}
+            obj.event_table = {}
+            obj.eventless = frozenset()
+            obj.final = frozenset()
+            obj.lazy = frozenset()
+            obj.coalescing = {}
+            obj.jump_table = {}
+            obj.report = None
         return obj
 
+    def _compile(cls) -> None:
+        # build the tables of every state built so far, replacing the
+        # previous ones whole so readers never see them half updated
+        states = tuple(cls.main)
+        # ids of events already known are kept when new states are built
+        cls.events = tuple(
+            dict.fromkeys(
+                cls.events
+                + tuple(y.event for x in states for y in x.transitions)
+            )
+        )
+        cls.event_ids = {x: i for i, x in enumerate(cls.events)}
+        cls.coalescing = cls._build_coalescing()
+        cls.transition_table = cls._build_table()
+        # candidates of each state indexed by event id, sharing the rows
+        # shared by the transition table
+        rows: dict[int, dict[int, Candidates]] = {}
+        cls.event_table = {}
+        for state, events in cls.transition_table.items():
+            row = rows.get(id(events))
+            if row is None:
+                row = rows[id(events)] = {
+                    cls.event_ids[x]: y for x, y in events.items()
+                }
+            cls.event_table[state] = row
+        cls.eventless = frozenset(
+            id(x)
+            for x in states
+            if any(y.event == '' and y.after is None for y in x.transitions)
+        )
+        cls.final = frozenset(id(x) for x in states if x.type == 'final')
+        cls.lazy = frozenset(id(x) for x in states if not x.loaded)
+        cls.jump_table = cls._build_jumps()
+        cls.report = cls._analyze()
+        log.info('analyzed statechart %s: %s', cls.__name__, cls.report)
+
+    def _build_coalescing(cls) -> dict[Event, tuple[str, str]]:
+        # policy and keyword of coalescible events by name and id
+        coalescing: dict[Event, tuple[str, str]] = {}
+        for event, setting in getattr(cls, '__coalesce__', {}).items():
+            policy, keyword = (
+                (setting, 'count') if isinstance(setting, str) else setting
+            )
+            if policy not in COALESCING:
+                raise InvalidConfig(
+                    f"coalescing must be one of {', '.join(COALESCING)}"
+                )
+            coalescing[event] = (policy, keyword)
+            if event in cls.event_ids:
+                coalescing[cls.event_ids[event]] = (policy, keyword)
+        return coalescing
+
+    def _materialize(cls, state: State) -> None:
+        # build lazy substates of state and add them to the tables
+        with LOADING:
+            substates = state._load()
+            for chart in cls._charts():
+                if any(id(x) not in chart.transition_table for x in substates):
+                    chart._compile()
+
+    def materialize(cls) -> None:
+        """Build every lazy region of the chart up front."""
+        with LOADING:
+            if cls._load_all():
+                for chart in cls._charts():
+                    chart._compile()
+
+    def _charts(cls) -> list[MetaStateChart]:
+        # subclasses share the states of a chart but compile their own tables
+        root = next(x for x in cls.__mro__ if 'main' in vars(x))
+        charts: list[MetaStateChart] = []
+        pending: list[type] = [root]
+        while pending:
+            chart = pending.pop()
+            if isinstance(chart, MetaStateChart) and chart.main is cls.main:
+                charts.append(chart)
+            pending.extend(chart.__subclasses__())
+        return charts
+
+    def _load_all(cls) -> bool:
+        # build every lazy state and report whether any was pending
+        pending = [x for x in tuple(cls.main) if not x.loaded]
+        loaded = bool(pending)
+        while pending:
+            state = pending.pop()
+            pending.extend(x for x in state._load() if not x.loaded)
+        return loaded
+
+    def _find_state(
+        cls, statepath: str, current: State, load: bool = True
+    ) -> State:
+        # resolve statepath from the main state or relative to current state
+        state: State = cls.main
+        macrostep = statepath.split('.')
+
+        # search outward from the current state for single query so names
+        # repeated by embedded templates resolve within their embedding
+        if len(macrostep) == 1:
+            searched: Optional[State] = None
+            for scope in reversed(current):
+                queue = deque([scope])
+                while queue:
+                    x = queue.pop()
+                    if x == macrostep[0]:
+                        return x
+                    queue.extendleft(
+                        y for y in x.substates if y is not searched
+                    )
+                searched = scope
+        # set start point if using relative lookup
+        elif statepath.startswith('.'):
+            relative = len(statepath) - len(statepath.lstrip('.')) - 1
+            state = tuple(reversed(current))[relative:][0]
+            macrostep = [state.name] + macrostep[relative + 1 :]
+
+        # check relative lookup is done
+        target = macrostep[-1]
+        if target in ('', state):
+            return state
+
+        # path based search
+        while state and macrostep:
+            microstep = macrostep.pop(0)
+            # skip if current state is at microstep
+            if state == microstep:
+                continue
+            # return current state if target found
+            if state == target:
+                return state
+            # walk path if exists
+            if hasattr(state, 'states') and microstep in state.states:
+                state = state.states[microstep]
+                # check if target is found
+                if not macrostep:
+                    return state
+            else:
+                break
+
+        # the state may be in a lazy region not built yet
+        if load and cls.lazy:
+            for state in tuple(cls.main):
+                if not state.loaded:
+                    cls._materialize(state)
+                    return cls._find_state(statepath, current, load)
+        raise InvalidState(f"state could not be found: {statepath}")
+
+    def _build_table(cls) -> dict[int, dict[str, Candidates]]:
+        # index transitions by event for each state of the chart, sharing
+        # equal rows so embeddings of a template are compiled once
+        trusted = getattr(cls, '__trusted__', False)
+        check = trusted or getattr(cls, '__conflict_check__', False)
+        table: dict[int, dict[str, Candidates]] = {}
+        rows: dict[Any, dict[str, Candidates]] = {}
+        for state in tuple(cls.main):
+            events: dict[str, list[Transition]] = {}
+            if not (trusted and state.type == 'final'):
+                for x in reversed(state):
+                    for transition in x.transitions:
+                        events.setdefault(transition.event, []).append(
+                            transition
+                        )
+            row = {
+                event: Candidates(
+                    tuple(transitions),
+                    len(transitions) == 1
+                    or (check and cls._is_exclusive(transitions)),
+                    tuple(cls._get_route(state, x) for x in transitions),
+                )
+                for event, transitions in events.items()
+            }
+            key = tuple(
+                (x, tuple(map(id, y.transitions)), y.exclusive, y.routes)
+                for x, y in row.items()
+            )
+            table[id(state)] = rows.setdefault(key, row)
+        return table
+
+    def _build_jumps(cls) -> dict[int, dict[str, Route]]:
+        # resolve where each accepted event leads when that does not depend
+        # on guards, leaving events choosing between transitions out
+        first = getattr(cls, '__selection__', 'strict') == 'first'
+        jumps: dict[int, dict[str, Route]] = {}
+        rows: dict[Any, dict[str, Route]] = {}
+        for state in tuple(cls.main):
+            row: dict[str, Route] = {}
+            if state.type != 'final':
+                for event, candidates in cls.transition_table[
+                    id(state)
+                ].items():
+                    target = cls._follow(state, candidates, first)
+                    if target is not None:
+                        row[event] = cls._relate(state, target)
+            jumps[id(state)] = rows.setdefault(tuple(row.items()), row)
+        return jumps
+
+    def _follow(
+        cls, state: State, candidates: Candidates, first: bool
+    ) -> Optional[State]:
+        # reach the target of candidates and the eventless ones it takes
+        index = cls._decide(candidates, first, True)
+        route = None if index is None else candidates.routes[index]
+        if route is None:
+            return None
+        target = route.target(state)
+        visited: set[int] = set()
+        while id(target) in cls.eventless and id(target) not in visited:
+            # eventless transitions are not recorded so only those taken
+            # whatever the guards are followed
+            visited.add(id(target))
+            follow = cls.transition_table[id(target)].get('')
+            if not follow:
+                break
+            index = cls._decide(follow, first, False)
+            route = None if index is None else follow.routes[index]
+            if route is None:
+                return None
+            target = route.target(target)
+        return target
+
+    @staticmethod
+    def _decide(
+        candidates: Candidates, first: bool, accepted: bool
+    ) -> Optional[int]:
+        # index of the transition taken without evaluating guards, trusting
+        # that a sole candidate of an accepted event passed its guards
+        enabled = [
+            i
+            for i, x in enumerate(candidates.transitions)
+            if not any(y.condition is False for y in x.cond)
+        ]
+        if not enabled:
+            return None
+        constant = all(
+            y.condition is True
+            for y in candidates.transitions[enabled[0]].cond
+        )
+        if len(enabled) == 1 and (accepted or constant):
+            return enabled[0]
+        if first and constant:
+            return enabled[0]
+        return None
+
+    def _get_route(
+        cls, state: State, transition: Transition
+    ) -> Optional[Route]:
+        # resolve the states exited and entered from state at build time
+        if transition.target in ('', state):
+            return Route(0, (), True)
+        try:
+            target = cls._find_state(transition.target, state, load=False)
+        except (InvalidState, IndexError):
+            return None
+        return cls._relate(state, target)
+
+    @staticmethod
+    def _relate(state: State, target: State) -> Route:
+        # express the way from state to target relative to state
+        source = tuple(reversed(state))[::-1]
+        path = tuple(reversed(target))[::-1]
+        i = 0
+        while i < min(len(source), len(path)) and source[i] is path[i]:
+            i += 1
+        return Route(
+            len(source) - i,
+            tuple(
+                next(
+                    j
+                    for j, y in enumerate(path[k - 1].substates)
+                    if y is path[k]
+                )
+                for k in range(i, len(path))
+            ),
+        )
+
+    def _analyze(cls) -> Report:
+        # inspect the transition table for mis-specified charts
+        states = tuple(cls.main)
+        table = cls.transition_table
+        strict = getattr(cls, '__selection__', 'strict') == 'strict'
+        unresolved: list[tuple[str, str]] = []
+        ambiguous: list[tuple[str, str]] = []
+        conflicts: list[tuple[str, str]] = []
+        final: list[tuple[str, str]] = []
+        for state in states:
+            for event, candidates in table[id(state)].items():
+                for transition, route in zip(
+                    candidates.transitions, candidates.routes
+                ):
+                    if route is None:
+                        unresolved.append((state.path, transition.target))
+                unguarded = [
+                    x
+                    for x in candidates.transitions
+                    if all(y.condition is True for y in x.cond)
+                ]
+                if strict and len(unguarded) > 1:
+                    ambiguous.append((state.path, event))
+                elif strict and not candidates.exclusive:
+                    conflicts.append((state.path, event))
+            if state.type == 'final':
+                final.extend((state.path, x.event) for x in state.transitions)
+
+        # follow every route from the initial state to find active states
+        active: set[int] = {id(cls.main)}
+        initial = cls.main.initial
+        if callable(initial):
+            active.update(id(x) for x in states)
+            pending: list[State] = []
+        elif initial:
+            try:
+                pending = [cls._find_state(initial, cls.main, load=False)]
+            except InvalidState:
+                unresolved.append((cls.main.path, initial))
+                pending = []
+        else:
+            pending = list(cls.main.substates[:1])
+        visited: set[int] = set()
+        while pending:
+            state = pending.pop()
+            if id(state) in visited:
+                continue
+            visited.add(id(state))
+            active.update(id(x) for x in reversed(state))
+            for candidates in table[id(state)].values():
+                for route in candidates.routes:
+                    if route is not None:
+                        pending.extend(route.entries(state))
+                        pending.append(route.target(state))
+
+        # eventless transitions are taken on entry of their own state
+        cycles: list[tuple[str, ...]] = []
+        seen: set[frozenset[int]] = set()
+
+        def walk(state: State, trail: tuple[State, ...]) -> None:
+            if any(x is state for x in trail):
+                cycle = trail[[id(x) for x in trail].index(id(state)) :]
+                key = frozenset(id(x) for x in cycle)
+                if key not in seen:
+                    seen.add(key)
+                    cycles.append(tuple(x.path for x in cycle))
+                return
+            if not any(x.event == '' for x in state.transitions):
+                return
+            candidates = table[id(state)].get('')
+            for route in candidates.routes if candidates else ():
+                if route is not None:
+                    walk(route.target(state), trail + (state,))
+
+        for state in states:
+            walk(state, ())
+
+        return Report(
+            unresolved=tuple(unresolved),
+            unreachable=tuple(x.path for x in states if id(x) not in active),
+            dead_ends=tuple(
+                x.path
+                for x in states
+                if x is not cls.main
+                and x.type == 'atomic'
+                and not table[id(x)]
+            ),
+            cycles=tuple(cycles),
+            ambiguous=tuple(ambiguous),
+            conflicts=tuple(conflicts),
+            final=tuple(final),
+        )
+
+    @staticmethod
+    def _is_exclusive(transitions: Iterable[Transition]) -> bool:
+        # transitions with a constant false guard can never be allowed
+        enabled = [
+            x
+            for x in transitions
+            if not any(y.condition is False for y in x.cond)
+        ]
+        return len(enabled) <= 1
+
 
 class StateChart(metaclass=MetaStateChart):
     """Provide state management capability."""
 
     __initial: State
+    __selection__ = 'strict'
+    __conflict_check__ = False
+    __trusted__ = False
+    __timers__ = TimerWheel()
+    __background__ = Background()
+    _observers: tuple[Callable[[StateChart, str], Any], ...] = ()
+    __pending: Optional[dict[int, list[Timer]]] = None
+    __queue: Optional[deque[list[Any]]] = None
+    __coalesced: Optional[dict[str, int]] = None
 
     def __init__(
         self,
@@ -448,6 +1651,10 @@ class StateChart(metaclass=MetaStateChart):
                 log.setLevel(kwargs['logging_level'].upper())
         log.info('initializing statemachine')
 
+        for field in self.fields:
+            if not hasattr(self, field.name):
+                setattr(self, field.name, field.initial())
+
         if hasattr(self.__class__, 'main'):
             self.__state = self.__class__.main
         else:
@@ -471,6 +1678,99 @@ class StateChart(metaclass=MetaStateChart):
             # self.__process_eventless_transition()
         log.info('statemachine initialization complete')
 
+    @classmethod
+    def bulk_create(
+        cls,
+        n: int,
+        initial: Optional[Union[Callable, str]] = None,
+        run_entry: bool = True,
+        **attrs: Any,
+    ) -> list[StateChart]:
+        """Create n machines in one pass without calling ``__init__``.
+
+        The initial state is resolved once and shared. Each machine is
+        given ``attrs`` as its extended state, with its own shallow copy of
+        list, dict, set and bytearray values. Entry actions of the initial
+        state are run for all machines in one batch when ``run_entry`` is
+        set, so buffered actions are flushed once.
+        """
+        if not hasattr(cls, 'main'):
+            raise InvalidConfig(
+                'attempted initialization with empty superstate'
+            )
+        current = initial or cls.main.initial
+        new = object.__new__
+        machines = [new(cls) for _ in range(n)]
+        # declared fields are set in slots rather than the attribute dict
+        fields = [(x, attrs.pop(x.name, x)) for x in cls.fields]
+        # mutable values are copied so machines do not share them
+        mutable = {k: v for k, v in attrs.items() if type(v) in MUTABLE}
+        for machine in machines:
+            machine.__dict__.update(attrs)
+            for name, value in mutable.items():
+                machine.__dict__[name] = copy.copy(value)
+            for field, value in fields:
+                setattr(
+                    machine,
+                    field.name,
+                    (
+                        field.initial()
+                        if value is field
+                        else (
+                            copy.copy(value)
+                            if type(value) in MUTABLE
+                            else value
+                        )
+                    ),
+                )
+        if callable(current):
+            for machine in machines:
+                machine.__state = cls._find_state(current(machine), cls.main)
+        else:
+            if current:
+                state = cls._find_state(current, cls.main)
+            elif cls.main.substates:
+                state = cls.main.substates[0]
+            else:
+                raise InvalidConfig(
+                    'an initial state must exist for statechart'
+                )
+            for machine in machines:
+                machine.__state = state
+        if run_entry:
+            cls._run_initial_entry(machines)
+        log.info('created %d machines', n)
+        return machines
+
+    @classmethod
+    def _run_initial_entry(cls, machines: Iterable[StateChart]) -> None:
+        # buffered entry actions are flushed once for every machine
+        with Buffer.batch():
+            for machine in machines:
+                machine.__state._run_on_entry(machine)
+
+    @classmethod
+    def _migrate(
+        cls,
+        machines: Iterable[StateChart],
+        state: State,
+        states: dict[int, Optional[State]],
+    ) -> None:
+        # move machines of another version of this chart to state
+        for machine in machines:
+            machine.__class__ = cls
+            machine.__state = state
+            if machine.__pending:
+                pending: dict[int, list[Timer]] = {}
+                for key, timers in machine.__pending.items():
+                    target = states.get(key)
+                    if target is None:
+                        for timer in timers:
+                            timer.cancel()
+                    else:
+                        pending.setdefault(id(target), []).extend(timers)
+                machine.__pending = pending
+
     def __getattr__(self, name: str) -> Any:
         # ignore private attribute lookups
         if name.startswith('__'):
@@ -482,6 +1782,40 @@ class StateChart(metaclass=MetaStateChart):
 
         raise AttributeError(f"unable to find {name!r} attribute")
 
+    def clone(self) -> StateChart:
+        """Create a machine sharing this chart and its current state.
+
+        Extended state values are shallow copied unless they are known to be
+        immutable, so neither machine sees the other change them. Values
+        that cannot be copied are shared. Observers, pending delayed events
+        and queued events are not carried over.
+        """
+        machine = object.__new__(self.__class__)
+        values = machine.__dict__
+        for name, value in self.__dict__.items():
+            if name in (
+                '_observers',
+                '_StateChart__pending',
+                '_StateChart__queue',
+                '_StateChart__coalesced',
+            ):
+                continue
+            values[name] = isolate(value)
+        for field in self.fields:
+            if hasattr(self, field.name):
+                setattr(
+                    machine, field.name, isolate(getattr(self, field.name))
+                )
+        return machine
+
+    def discard(self) -> None:
+        """Release a clone and cancel its pending delayed events."""
+        if self.__pending:
+            for timers in self.__pending.values():
+                for timer in timers:
+                    timer.cancel()
+            self.__pending = None
+
     @property
     def active(self) -> tuple[State, ...]:
         """Return active states."""
@@ -547,75 +1881,319 @@ class StateChart(metaclass=MetaStateChart):
 
     def get_state(self, statepath: str) -> State:
         """Get state."""
-        state: State = self.main
-        macrostep = statepath.split('.')
-
-        # general recursive search for single query
-        if len(macrostep) == 1:
-            for x in tuple(state):
-                if x == macrostep[0]:
-                    return x
-        # set start point if using relative lookup
-        elif statepath.startswith('.'):
-            relative = len(statepath) - len(statepath.lstrip('.')) - 1
-            state = self.active[relative:][0]
-            macrostep = [state.name] + macrostep[relative + 1 :]
-
-        # check relative lookup is done
-        target = macrostep[-1]
-        if target in ('', state):
-            return state
+        return self.__class__._find_state(statepath, self.state)
 
-        # path based search
-        while state and macrostep:
-            microstep = macrostep.pop(0)
-            # skip if current state is at microstep
-            if state == microstep:
-                continue
-            # return current state if target found
-            if state == target:
-                return state
-            # walk path if exists
-            if hasattr(state, 'states') and microstep in state.states:
-                state = state.states[microstep]
-                # check if target is found
-                if not macrostep:
-                    return state
-            else:
-                break
-        raise InvalidState(f"state could not be found: {statepath}")
-
-    def get_transitions(self, event: str) -> tuple[Transition, ...]:
+    def get_transitions(self, event: Event) -> tuple[Transition, ...]:
         """Get each transition maching event."""
-        return tuple(
-            filter(
-                lambda transition: transition.event == event, self.transitions
-            )
-        )
+        if event.__class__ is int:
+            candidates = self.event_table[id(self.state)].get(event)
+        else:
+            candidates = self.transition_table[id(self.state)].get(event)
+        return candidates.transitions if candidates else ()
 
-    def trigger(self, event: str, *args: Any, **kwargs: Any) -> None:
+    def trigger(self, event: Event, *args: Any, **kwargs: Any) -> None:
         # TODO: need to consider superstate transitions.
-        if self.state.type == 'final':
+        result = self.__dispatch(event, *args, **kwargs)
+        if result == Result.FINAL:
             raise InvalidTransition('cannot transition from final state')
-
-        transitions = self.get_transitions(event)
-        if not transitions:
+        if result == Result.NO_TRANSITION:
             raise InvalidTransition('no transitions match event')
-        allowed = []
-        for transition in transitions:
-            if transition.evaluate(self, *args, **kwargs):
-                allowed.append(transition)
-        if not allowed:
+        if result == Result.GUARD_FAILED:
             raise GuardNotSatisfied(
                 'Guard is not satisfied for this transition'
             )
-        if len(allowed) > 1:
+        if result == Result.FORKED:
             raise ForkedTransition(
                 'More than one transition was allowed for this event'
             )
-        log.info('processed guard for %s', allowed[0].event)
-        allowed[0].run(self, *args, **kwargs)
-        log.info('processed transition event %s', allowed[0].event)
+
+    def subscribe(self, observer: Callable[[StateChart, str], Any]) -> None:
+        """Call observer with this machine and event after each transition.
+
+        Observers are not called when an action of the transition raises.
+        """
+        self._observers = (*self._observers, observer)
+
+    def unsubscribe(self, observer: Callable[[StateChart, str], Any]) -> None:
+        """Stop calling observer after transitions."""
+        self._observers = tuple(x for x in self._observers if x != observer)
+
+    def send_after(
+        self, event: str, delay: float, *args: Any, **kwargs: Any
+    ) -> Timer:
+        """Process event after delay unless the current state is exited."""
+        return self._schedule(self.state, event, delay, *args, **kwargs)
+
+    def _schedule(
+        self,
+        state: State,
+        event: str,
+        delay: float,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Timer:
+        if self.__pending is None:
+            self.__pending = {}
+        pending = self.__pending.setdefault(id(state), [])
+        pending[:] = [x for x in pending if x.active]
+        timer = self.__timers__.schedule(
+            delay, self.__fire, event, args, kwargs
+        )
+        pending.append(timer)
+        return timer
+
+    def _cancel_timers(self, state: State) -> None:
+        if self.__pending:
+            for timer in self.__pending.pop(id(state), ()):
+                timer.cancel()
+
+    def __fire(
+        self, event: str, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> None:
+        # delayed events that no longer apply are only logged
+        result = self.try_trigger(event, *args, **kwargs)
+        if result != Result.APPLIED:
+            log.info('delayed event %r not applied: %s', event, result.name)
+
+    def try_trigger(self, event: Event, *args: Any, **kwargs: Any) -> Result:
+        """Process event and report the outcome instead of raising.
+
+        Exceptions raised by actions are still propagated.
+        """
+        return self.__dispatch(event, *args, **kwargs)
+
+    def trigger_many(self, events: Iterable[Event]) -> list[Result]:
+        """Process each event in order and report their outcomes.
+
+        Buffered actions are flushed once after the last event.
+        """
+        dispatch = self.__dispatch
+        with Buffer.batch():
+            return [dispatch(event) for event in events]
+
+    def post(self, event: Event, *args: Any, **kwargs: Any) -> None:
+        """Queue event to be processed by ``process``.
+
+        Consecutive posts of an event declared in ``__coalesce__`` are
+        merged. With ``drop`` the first is kept, with ``last`` the latest
+        replaces it and with ``count`` the latest replaces it and the number
+        merged is passed as a keyword, ``count`` unless another is given.
+        """
+        queue = self.__queue
+        if queue is None:
+            queue = self.__queue = deque()
+        coalescing = self.coalescing.get(event)
+        if coalescing is not None and isinstance(event, int):
+            # ids and names of an event are merged alike
+            event = self.events[event]
+        if coalescing is not None and queue and queue[-1][0] == event:
+            entry = queue[-1]
+            if self.__coalesced is None:
+                self.__coalesced = {}
+            name = str(event)
+            self.__coalesced[name] = self.__coalesced.get(name, 0) + 1
+            entry[3] += 1
+            if coalescing[0] != 'drop':
+                entry[1] = args
+                entry[2] = kwargs
+            return
+        queue.append([event, args, kwargs, 1])
+
+    def process(self) -> list[Result]:
+        """Dispatch queued events in order and report their outcomes.
+
+        Buffered actions are flushed once after the last event.
+        """
+        results: list[Result] = []
+        queue = self.__queue
+        if not queue:
+            return results
+        dispatch = self.__dispatch
+        coalescing = self.coalescing
+        with Buffer.batch():
+            while queue:
+                event, args, kwargs, count = queue.popleft()
+                policy = coalescing.get(event)
+                if policy is not None and policy[0] == 'count':
+                    kwargs = {**kwargs, policy[1]: count}
+                results.append(dispatch(event, *args, **kwargs))
+        return results
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued events."""
+        return len(self.__queue) if self.__queue else 0
+
+    @property
+    def coalesced(self) -> dict[str, int]:
+        """Count events merged into an earlier post by event."""
+        return dict(self.__coalesced or {})
+
+    def __dispatch(self, event: Event, *args: Any, **kwargs: Any) -> Result:
+        # select and run a transition reporting why none could be taken
+        # final states report the same outcome whether trusted or not
+        if id(self.__state) in self.final:
+            return Result.FINAL
+
+        # interned event ids index candidates without hashing
+        if event.__class__ is int:
+            # ids outside the vocabulary match no transition
+            candidates = self.event_table[id(self.__state)].get(event)
+        else:
+            candidates = self.transition_table[id(self.__state)].get(event)
+        if not candidates:
+            return Result.NO_TRANSITION
+        result, index = self.__select(candidates, *args, **kwargs)
+        if result != Result.APPLIED:
+            return result
+        transition = candidates.transitions[index]
+        log.info('processed guard for %s', transition.event)
+        route = candidates.routes[index]
+        if self.__trusted__ and route:
+            self.__traverse(transition, route, *args, **kwargs)
+        else:
+            transition.run(self, *args, **kwargs)
+        # transitions interrupted by a failing action are not observed
+        for observer in self._observers:
+            observer(self, transition.event)
+        log.info('processed transition event %s', transition.event)
+        return Result.APPLIED
+
+    def __select(
+        self, candidates: Candidates, *args: Any, **kwargs: Any
+    ) -> tuple[Result, int]:
+        # evaluate guards to find the index of the transition to take
+        memo: dict[Any, bool] = {}
+        if candidates.exclusive or self.__selection__ == 'first':
+            for index, transition in enumerate(candidates.transitions):
+                if transition.check(self, memo, *args, **kwargs):
+                    return Result.APPLIED, index
+            return Result.GUARD_FAILED, -1
+        allowed = []
+        for index, transition in enumerate(candidates.transitions):
+            if transition.check(self, memo, *args, **kwargs):
+                allowed.append(index)
+        if not allowed:
+            return Result.GUARD_FAILED, -1
+        if len(allowed) > 1:
+            return Result.FORKED, -1
+        return Result.APPLIED, allowed[0]
+
+    def fast_forward(
+        self, events: Iterable[Event], guards: bool = True
+    ) -> int:
+        """Advance through events without running actions.
+
+        Only guards are evaluated, so entry, exit and transition actions,
+        delayed events and observers are skipped. Delayed events pending
+        for states that are left are cancelled. Eventless transitions of
+        each target state are followed. Without guards, events with a sole
+        candidate jump to a target resolved at class creation, trusting
+        that the events were accepted when recorded, while guards are still
+        evaluated for events choosing between transitions. Events that do
+        not apply are ignored and the number of events applied is returned.
+        """
+        applied = 0
+        names = self.events
+        if not guards:
+            jumps = self.jump_table
+            state = self.__state
+            for event in events:
+                if isinstance(event, int):
+                    if not 0 <= event < len(names):
+                        continue
+                    event = names[event]
+                jump = jumps[id(state)].get(event)
+                if jump is None and self.lazy:
+                    # the target may be in a region that is not built yet
+                    self.__class__.materialize()
+                    jumps = self.jump_table
+                    jump = jumps[id(state)].get(event)
+                if jump is None:
+                    # the transition taken depends on guards
+                    self.__state = state
+                    if self.__advance(event):
+                        applied += 1
+                    state = self.__state
+                    continue
+                target = jump.target(state)
+                if self.__pending:
+                    self.__leave(
+                        (state,)
+                        if target is state
+                        else [
+                            x
+                            for x in reversed(state)
+                            if not any(x is y for y in reversed(target))
+                        ]
+                    )
+                state = target
+                applied += 1
+            self.__state = state
+            return applied
+        for event in events:
+            if isinstance(event, int):
+                if not 0 <= event < len(names):
+                    continue
+                event = names[event]
+            if self.__advance(event):
+                applied += 1
+        return applied
+
+    def __advance(self, event: str) -> bool:
+        # take transition and any eventless ones that follow without actions
+        if not self.__step(event):
+            return False
+        for _ in range(len(self.transition_table)):
+            if id(self.__state) not in self.eventless or not self.__step(''):
+                break
+        return True
+
+    def __step(self, event: str) -> bool:
+        # move to the target of the selected transition
+        if self.__state.type == 'final':
+            return False
+        candidates = self.transition_table[id(self.__state)].get(event)
+        if not candidates:
+            return False
+        result, index = self.__select(candidates)
+        if result != Result.APPLIED:
+            return False
+        route = candidates.routes[index]
+        if route is None:
+            if not self.lazy:
+                return False
+            self.__class__.materialize()
+            return self.__step(event)
+        if self.__pending:
+            self.__leave(route.exits(self.__state))
+        self.__state = route.target(self.__state)
+        return True
+
+    def __leave(self, states: Iterable[State]) -> None:
+        # delayed events of states left while fast forwarding do not fire
+        for state in states:
+            self._cancel_timers(state)
+
+    def __traverse(
+        self, transition: Transition, route: Route, *args: Any, **kwargs: Any
+    ) -> None:
+        # follow route resolved at class creation without validating it
+        state = self.__state
+        if route.loop:
+            state._run_on_exit(self)
+            transition.execute(self, *args, **kwargs)
+            state._run_on_entry(self)
+            log.info('changed state to %s', transition.target)
+            return
+        for _ in range(route.up):
+            state._run_on_exit(self)
+            state = self.__state = state.superstate or self.main
+        transition.execute(self, *args, **kwargs)
+        for index in route.down:
+            state = self.__state = state.substates[index]
+            state._run_on_entry(self)
+        log.info('changed state to %s', transition.target)
 
 
 class FluidstateException(Exception):
@@ -0,0 +1,369 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Explore the configurations a statechart can reach."""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from collections.abc import Hashable, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Any, NamedTuple, Optional
+
+from . import Candidates, InvalidConfig, State, StateChart
+
+__all__ = ('Exploration', 'Explorer', 'Trace')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# outcomes of a dispatch that do not change state
+FAILED = -1
+FORKED = -2
+# label of the move settling a state whose eventless transitions were refused
+SETTLE = -1
+
+Moves = tuple[list[tuple[int, int]], list[int]]
+
+
+class Trace(NamedTuple):
+    """Represent events leading from the initial state to a state."""
+
+    state: str
+    events: tuple[str, ...]
+
+
+class Exploration(NamedTuple):
+    """Summarize the configurations reached by an exploration.
+
+    Deadlocks are non-final states where no transition can be taken, forks
+    are events that may enable several transitions under strict selection
+    and cycles are states that can be re-entered by eventless transitions
+    alone. Each is reported with a trace of the events reaching it. Chain is
+    the longest run of eventless transitions outside of cycles.
+    """
+
+    configurations: int
+    reachable: tuple[str, ...]
+    deadlocks: tuple[Trace, ...]
+    forks: tuple[Trace, ...]
+    cycles: tuple[Trace, ...]
+    chain: int
+
+
+class Explorer:
+    """Search the configurations of a statechart breadth-first.
+
+    Configurations are read from the compiled transition table without
+    creating machines or running actions. Each is encoded as an integer
+    from the index of the active state and whether its eventless
+    transitions are pending.
+
+    Guards are abstracted to their possible outcomes. Constant guards keep
+    their value, guards keyed in ``guards`` take the listed outcomes and
+    any other guard may pass or fail. Guards sharing a key take the same
+    outcome within a dispatch.
+
+    With ``processes`` the frontier of each level is expanded on a process
+    pool, which requires the statechart and guards to be importable.
+    """
+
+    def __init__(
+        self,
+        chart: type[StateChart],
+        guards: Optional[Mapping[Hashable, Iterable[bool]]] = None,
+        initial: Optional[str] = None,
+        processes: Optional[int] = None,
+        batch: int = 1024,
+    ) -> None:
+        if not chart.transition_table:
+            raise InvalidConfig(
+                'exploration requires a statechart with states'
+            )
+        # every region is built so the whole chart is indexed
+        chart.materialize()
+        self.chart = chart
+        self.guards = {k: tuple(v) for k, v in (guards or {}).items()}
+        self.processes = processes
+        self.batch = batch
+        self.__states = tuple(chart.main)
+        self.__index = {id(x): i for i, x in enumerate(self.__states)}
+        self.__events = {x: i for i, x in enumerate(chart.events)}
+        self.__cache: dict[int, Moves] = {}
+        current = initial or chart.main.initial
+        if callable(current):
+            raise InvalidConfig('exploration requires a named initial state')
+        paths = {x.path: x for x in self.__states}
+        if current in paths:
+            state = paths[current]
+        elif current:
+            state = chart._find_state(current, chart.main)
+        elif chart.main.substates:
+            state = chart.main.substates[0]
+        else:
+            state = chart.main
+        self.initial = self.__enter(state)
+
+    def state(self, configuration: int) -> State:
+        """Return the active state of an encoded configuration."""
+        return self.__states[configuration >> 1]
+
+    def successors(self, configuration: int) -> Moves:
+        """Return moves from a configuration and events that may fork.
+
+        Moves are pairs of event index and configuration reached, where the
+        index is ``-1`` when eventless transitions were refused.
+        """
+        if configuration not in self.__cache:
+            self.__cache[configuration] = self.__expand(configuration)
+        return self.__cache[configuration]
+
+    def explore(self) -> Exploration:
+        """Visit every reachable configuration and check its properties."""
+        size = len(self.__states) * 2
+        visited = bytearray(size)
+        parents = array('q', [-1]) * size
+        labels = array('i', [SETTLE]) * size
+        deadlocks: list[int] = []
+        forks: list[tuple[int, int]] = []
+        eventless: dict[int, list[int]] = {}
+        frontier = [self.initial]
+        visited[self.initial] = 1
+        while frontier:
+            following: list[int] = []
+            for configuration, (moves, forked) in zip(
+                frontier, self.__map(frontier)
+            ):
+                forks.extend((configuration, x) for x in forked)
+                if not moves and not configuration & 1:
+                    if self.state(configuration).type != 'final':
+                        deadlocks.append(configuration)
+                for label, target in moves:
+                    if configuration & 1 and label != SETTLE:
+                        eventless.setdefault(configuration, []).append(target)
+                    if not visited[target]:
+                        visited[target] = 1
+                        parents[target] = configuration
+                        labels[target] = label
+                        following.append(target)
+            frontier = following
+        chain, cycles = self.__chains(eventless)
+        reached = [x for x in range(size) if visited[x]]
+        log.info('explored %d configurations', len(reached))
+
+        def trace(configuration: int, *extra: str) -> Trace:
+            return Trace(
+                self.state(configuration).path,
+                self.__trail(parents, labels, configuration) + extra,
+            )
+
+        events = self.chart.events
+        return Exploration(
+            configurations=len(reached),
+            reachable=tuple(
+                dict.fromkeys(self.state(x).path for x in reached)
+            ),
+            deadlocks=tuple(trace(x) for x in deadlocks),
+            forks=tuple(trace(x, events[y]) for x, y in forks),
+            cycles=tuple(trace(x) for x in cycles),
+            chain=chain,
+        )
+
+    def trace(self, statepath: str) -> Optional[Trace]:
+        """Return the shortest events reaching state or None if unreachable."""
+        state = self.chart._find_state(statepath, self.chart.main)
+        goal = self.__index[id(state)]
+        size = len(self.__states) * 2
+        parents = array('q', [-1]) * size
+        labels = array('i', [SETTLE]) * size
+        visited = bytearray(size)
+        visited[self.initial] = 1
+        frontier = [self.initial]
+        while frontier:
+            following: list[int] = []
+            for configuration in frontier:
+                if configuration >> 1 == goal:
+                    return Trace(
+                        state.path,
+                        self.__trail(parents, labels, configuration),
+                    )
+                for label, target in self.successors(configuration)[0]:
+                    if not visited[target]:
+                        visited[target] = 1
+                        parents[target] = configuration
+                        labels[target] = label
+                        following.append(target)
+            frontier = following
+        return None
+
+    def __map(self, frontier: list[int]) -> Iterable[Moves]:
+        # expand a level of configurations locally or on a process pool
+        if not self.processes or len(frontier) <= self.batch:
+            return map(self.successors, frontier)
+        chunks = [
+            frontier[x : x + self.batch]
+            for x in range(0, len(frontier), self.batch)
+        ]
+        with ProcessPoolExecutor(self.processes) as pool:
+            results = pool.map(
+                _expand,
+                [(self.chart, self.guards, self.state(self.initial).path)]
+                * len(chunks),
+                chunks,
+            )
+            return [y for x in results for y in x]
+
+    def __enter(self, state: State) -> int:
+        # eventless transitions are taken on entry unless the state is final
+        pending = id(state) in self.chart.eventless and state.type != 'final'
+        return self.__index[id(state)] << 1 | pending
+
+    def __expand(self, configuration: int) -> Moves:
+        state = self.state(configuration)
+        table = self.chart.transition_table[id(state)]
+        moves: list[tuple[int, int]] = []
+        forked: list[int] = []
+        if configuration & 1:
+            targets = self.__dispatch(state, table[''])
+            for target in targets:
+                if target >= 0:
+                    moves.append(
+                        (
+                            self.__events[''],
+                            self.__enter(self.__states[target]),
+                        )
+                    )
+            if FAILED in targets or FORKED in targets:
+                moves.append((SETTLE, configuration & ~1))
+            return moves, forked
+        if state.type == 'final':
+            return moves, forked
+        for event, candidates in table.items():
+            # eventless transitions are only delivered by timers when stable
+            if event == '' and not any(
+                y.event == '' and y.after is not None
+                for x in reversed(state)
+                for y in x.transitions
+            ):
+                continue
+            targets = self.__dispatch(state, candidates)
+            if FORKED in targets:
+                forked.append(self.__events[event])
+            for target in targets:
+                if target >= 0:
+                    moves.append(
+                        (
+                            self.__events[event],
+                            self.__enter(self.__states[target]),
+                        )
+                    )
+        return moves, forked
+
+    def __dispatch(self, state: State, candidates: Candidates) -> set[int]:
+        # collect targets of each combination of abstract guard outcomes
+        keys: dict[Any, tuple[bool, ...]] = {}
+        for transition in candidates.transitions:
+            for guard in transition.cond:
+                if isinstance(guard.condition, bool):
+                    keys[guard.key] = (guard.condition,)
+                else:
+                    keys[guard.key] = self.guards.get(guard.key, (True, False))
+        first = (
+            candidates.exclusive
+            or getattr(self.chart, '__selection__', 'strict') == 'first'
+        )
+        outcomes: set[int] = set()
+        for values in product(*keys.values()):
+            outcome = dict(zip(keys, values))
+            allowed = [
+                i
+                for i, x in enumerate(candidates.transitions)
+                if all(outcome[y.key] for y in x.cond)
+            ]
+            if not allowed:
+                outcomes.add(FAILED)
+            elif len(allowed) > 1 and not first:
+                outcomes.add(FORKED)
+            else:
+                route = candidates.routes[allowed[0]]
+                if route is not None:
+                    outcomes.add(self.__index[id(route.target(state))])
+        return outcomes
+
+    def __chains(
+        self, eventless: dict[int, list[int]]
+    ) -> tuple[int, list[int]]:
+        # find the longest eventless chain and configurations on cycles
+        depth: dict[int, int] = {}
+        cycles: list[int] = []
+        for start in eventless:
+            if start in depth:
+                continue
+            stack = [(start, iter(eventless[start]))]
+            active = {start}
+            while stack:
+                configuration, targets = stack[-1]
+                target = next(targets, None)
+                if target is None:
+                    stack.pop()
+                    active.discard(configuration)
+                    depth[configuration] = max(
+                        (
+                            depth.get(x, 0) + 1
+                            for x in eventless[configuration]
+                        ),
+                        default=0,
+                    )
+                elif target in active:
+                    cycles.append(target)
+                    depth[target] = 0
+                elif target not in depth and target in eventless:
+                    active.add(target)
+                    stack.append((target, iter(eventless[target])))
+        return max(depth.values(), default=0), list(dict.fromkeys(cycles))
+
+    def __trail(
+        self, parents: array, labels: array, configuration: int
+    ) -> tuple[str, ...]:
+        events: list[str] = []
+        while configuration != self.initial:
+            parent = parents[configuration]
+            # eventless transitions follow without being sent
+            if not parent & 1:
+                events.append(self.chart.events[labels[configuration]])
+            configuration = parent
+        return tuple(reversed(events))
+
+
+_explorers: dict[tuple[Any, ...], Explorer] = {}
+
+
+def _expand(
+    settings: tuple[type[StateChart], dict[Hashable, tuple[bool, ...]], str],
+    configurations: list[int],
+) -> list[Moves]:
+    # expand configurations in a pool worker reusing its explorer
+    chart, guards, initial = settings
+    key = (chart, tuple(guards.items()), initial)
+    if key not in _explorers:
+        _explorers[key] = Explorer(chart, guards, initial)
+    return [_explorers[key].successors(x) for x in configurations]
@@ -0,0 +1,319 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Manage populations of machines sharing a statechart."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Hashable, Iterable, Iterator, Mapping
+from itertools import count
+from typing import Any, Optional, Union
+
+from . import Buffer, Event, Field, InvalidConfig, Result, State, StateChart
+from .migrate import Migration, Migrator
+
+__all__ = ('Fleet',)
+
+# fixed-width array types of fields that can be stored as columns
+TYPECODES = {bool: 'B', int: 'q', float: 'd'}
+
+
+class Fleet:
+    """Index machines of a statechart by their current state.
+
+    Machines are grouped by state as they transition, so events broadcast
+    to the fleet are only delivered to machines in states with a transition
+    for that event, and occupancy of each state is known without visiting
+    the machines.
+    """
+
+    def __init__(self, chart: type[StateChart]) -> None:
+        if not chart.transition_table:
+            raise InvalidConfig('fleet requires a statechart with states')
+        self.chart = chart
+        self.__machines: dict[Hashable, StateChart] = {}
+        self.__keys: dict[int, Hashable] = {}
+        self.__where: dict[Hashable, int] = {}
+        self.__members: dict[int, set[Hashable]] = {
+            x: set() for x in chart.transition_table
+        }
+        self.__accepts: dict[Event, tuple[int, ...]] = {}
+        self.__counter = count()
+        self.__table: dict[int, Any] = {}
+        self.__paths: dict[str, State] = {}
+        self.__descendants: dict[int, tuple[int, ...]] = {}
+        self.__sync()
+
+    def __len__(self) -> int:
+        return len(self.__machines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__machines
+
+    def __getitem__(self, key: Hashable) -> StateChart:
+        return self.__machines[key]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.__machines)
+
+    def add(
+        self, machine: StateChart, key: Optional[Hashable] = None
+    ) -> Hashable:
+        """Register machine with the fleet and return its key."""
+        if not isinstance(machine, self.chart):
+            raise InvalidConfig('machine does not use the fleet statechart')
+        if key is None:
+            key = next(self.__counter)
+            while key in self.__machines:
+                key = next(self.__counter)
+        elif key in self.__machines:
+            raise InvalidConfig(f"machine already registered: {key!r}")
+        self.__machines[key] = machine
+        self.__keys[id(machine)] = key
+        self.__where[key] = id(machine.state)
+        if id(machine.state) not in self.__members:
+            self.__sync()
+        self.__members[id(machine.state)].add(key)
+        machine.subscribe(self._update)
+        return key
+
+    def create(self, n: int, **kwargs: Any) -> list[Hashable]:
+        """Create n machines with ``bulk_create`` and register them."""
+        return self.extend(self.chart.bulk_create(n, **kwargs))
+
+    def extend(self, machines: Iterable[StateChart]) -> list[Hashable]:
+        """Register new machines with the fleet and return their keys."""
+        keys: list[Hashable] = []
+        observers = (self._update,)
+        for machine in machines:
+            if not isinstance(machine, self.chart):
+                raise InvalidConfig(
+                    'machine does not use the fleet statechart'
+                )
+            key = next(self.__counter)
+            while key in self.__machines:
+                key = next(self.__counter)
+            self.__machines[key] = machine
+            self.__keys[id(machine)] = key
+            self.__where[key] = id(machine.state)
+            if id(machine.state) not in self.__members:
+                self.__sync()
+            self.__members[id(machine.state)].add(key)
+            if machine._observers:
+                machine.subscribe(self._update)
+            else:
+                machine._observers = observers
+            keys.append(key)
+        return keys
+
+    def remove(self, key: Hashable) -> StateChart:
+        """Unregister machine from the fleet."""
+        machine = self.__machines.pop(key)
+        del self.__keys[id(machine)]
+        self.__members[self.__where.pop(key)].discard(key)
+        machine.unsubscribe(self._update)
+        return machine
+
+    def accepts(self, event: Event) -> tuple[int, ...]:
+        """Return identity of states with a transition for event."""
+        if self.__table is not self.chart.transition_table:
+            self.__sync()
+        if event not in self.__accepts:
+            events = self.chart.events
+            if isinstance(event, int):
+                name = events[event] if 0 <= event < len(events) else None
+            else:
+                name = event
+            self.__accepts[event] = tuple(
+                id(x)
+                for x in self.chart.main
+                if x.type != 'final'
+                and name in self.chart.transition_table[id(x)]
+            )
+        return self.__accepts[event]
+
+    def eligible(self, event: Event) -> list[Hashable]:
+        """Return keys of machines in states with a transition for event."""
+        members = self.__members
+        return [x for state in self.accepts(event) for x in members[state]]
+
+    def broadcast(
+        self, event: Event, *args: Any, **kwargs: Any
+    ) -> dict[Hashable, Result]:
+        """Deliver event to eligible machines and report their outcomes.
+
+        Buffered actions are flushed once after every machine is reached.
+        """
+        machines = self.__machines
+        with Buffer.batch():
+            return {
+                x: machines[x].try_trigger(event, *args, **kwargs)
+                for x in self.eligible(event)
+            }
+
+    def fast_forward(
+        self, records: Iterable[tuple[Hashable, Event]], guards: bool = True
+    ) -> int:
+        """Advance machines through keyed events without running actions.
+
+        Events are applied in order for each machine as with
+        ``StateChart.fast_forward`` and the number applied is returned.
+        """
+        batches: dict[Hashable, list[Event]] = {}
+        for key, event in records:
+            batch = batches.get(key)
+            if batch is None:
+                batch = batches[key] = []
+            batch.append(event)
+        applied = 0
+        for key, events in batches.items():
+            machine = self.__machines[key]
+            applied += machine.fast_forward(events, guards)
+            self._update(machine, '')
+        return applied
+
+    def get_state(self, statepath: Union[State, str]) -> State:
+        """Get state of the fleet statechart by statepath or name."""
+        if self.__table is not self.chart.transition_table:
+            self.__sync()
+        if isinstance(statepath, State):
+            return statepath
+        if statepath in self.__paths:
+            return self.__paths[statepath]
+        return self.chart._find_state(statepath, self.chart.main)
+
+    def count(self, statepath: Union[State, str]) -> int:
+        """Count machines in state or any of its descendants."""
+        members = self.__members
+        return sum(
+            len(members.get(x, ()))
+            for x in self.__descendants[id(self.get_state(statepath))]
+        )
+
+    def members(self, statepath: Union[State, str]) -> list[Hashable]:
+        """Return keys of machines in state or any of its descendants."""
+        members = self.__members
+        return [
+            y
+            for x in self.__descendants[id(self.get_state(statepath))]
+            for y in tuple(members.get(x, ()))
+        ]
+
+    def occupancy(self) -> dict[str, int]:
+        """Count machines in each state including its descendants."""
+        if self.__table is not self.chart.transition_table:
+            self.__sync()
+        counts = {x: len(y) for x, y in self.__members.items()}
+        return {
+            path: sum(counts.get(x, 0) for x in self.__descendants[id(state)])
+            for path, state in self.__paths.items()
+        }
+
+    def column(self, name: str) -> array:
+        """Gather a declared field of every machine into a binary column.
+
+        Values are ordered as the fleet iterates its keys.
+        """
+        field = self.__field(name)
+        machines = self.__machines
+        return array(
+            TYPECODES[field.type],
+            [getattr(machines[x], name) for x in machines],
+        )
+
+    def assign(self, name: str, values: Iterable[Any]) -> None:
+        """Set a declared field of every machine from a column."""
+        field = self.__field(name)
+        column = array(TYPECODES[field.type], values)
+        if len(column) != len(self.__machines):
+            raise InvalidConfig('column does not match the fleet size')
+        convert = field.type
+        for machine, value in zip(self.__machines.values(), column):
+            setattr(machine, name, convert(value))
+
+    def migrate(
+        self,
+        chart: type[StateChart],
+        mapping: Optional[Mapping[str, Optional[str]]] = None,
+        run_entry: bool = False,
+    ) -> Migration:
+        """Move every machine to a new version of the fleet statechart.
+
+        States are mapped as by ``Migrator``. Machines in states without a
+        counterpart are removed from the fleet and reported by key.
+        """
+        migrator = Migrator(self.chart, chart, mapping)
+        machines = self.__machines
+        groups: dict[int, list[StateChart]] = {}
+        members: dict[int, set[Hashable]] = {}
+        missing: dict[Hashable, StateChart] = {}
+        for state, keys in self.__members.items():
+            if not keys:
+                continue
+            target = migrator.targets.get(state)
+            if target is None:
+                missing.update((x, machines[x]) for x in keys)
+                continue
+            groups[state] = [machines[x] for x in keys]
+            members.setdefault(id(target), set()).update(keys)
+        for key in missing:
+            self.remove(key)
+        self.chart = chart
+        self.__members = members
+        self.__where = {x: state for state, y in members.items() for x in y}
+        self.__sync()
+        return migrator._apply(groups, missing, run_entry)
+
+    def state_of(self, key: Hashable) -> State:
+        """Return state a machine was last seen in."""
+        return self.__machines[key].state
+
+    def __sync(self) -> None:
+        # index states built since the tables were last seen
+        self.__table = self.chart.transition_table
+        self.__accepts.clear()
+        states = tuple(self.chart.main)
+        self.__paths = {x.path: x for x in states}
+        self.__descendants = {
+            id(x): tuple(id(y) for y in tuple(x)) for x in states
+        }
+        for state in states:
+            self.__members.setdefault(id(state), set())
+
+    def __field(self, name: str) -> Field:
+        for field in self.chart.fields:
+            if field.name == name:
+                if field.type not in TYPECODES:
+                    raise InvalidConfig(f"field cannot be a column: {name}")
+                return field
+        raise InvalidConfig(f"field is not declared: {name}")
+
+    def _update(self, machine: StateChart, event: str) -> None:
+        # move machine to the member set of its current state
+        key = self.__keys[id(machine)]
+        state = id(machine.state)
+        previous = self.__where[key]
+        if previous != state:
+            self.__members[previous].discard(key)
+            if state not in self.__members:
+                self.__sync()
+            self.__members[state].add(key)
+            self.__where[key] = state
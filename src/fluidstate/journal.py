@@ -0,0 +1,294 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Record accepted events in an append-only binary journal."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, NamedTuple, Optional
+
+from . import Event, InvalidConfig, StateChart
+
+__all__ = ('Journal', 'Record')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# machine id, event index, timestamp and payload reference
+RECORD = struct.Struct('<QIdq')
+SEGMENT = 'journal-{:08d}.log'
+# event names indexed by the ids of records, one JSON string per line
+VOCABULARY = 'events.log'
+
+
+class Record(NamedTuple):
+    """Represent an event accepted by a machine."""
+
+    machine: int
+    event: int
+    timestamp: float
+    payload: int = -1
+
+
+class Journal:
+    """Append fixed-size event records to segmented files.
+
+    Records are buffered in memory and written once ``buffer_size`` bytes
+    accumulate. Written buffers are fsynced together every ``sync_every``
+    writes, and on ``sync`` or ``close``. A new segment is started once the
+    current one reaches ``segment_size`` bytes.
+
+    Event ids of records index ``events``, the vocabulary of the journal.
+    It starts as the events of the chart and grows as events of lazy
+    regions are recorded, and is kept beside the segments so records are
+    decoded by name whatever ids the reading process assigned.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        chart: type[StateChart],
+        segment_size: int = 64 * 1024 * 1024,
+        buffer_size: int = 1024 * 1024,
+        sync_every: int = 8,
+    ) -> None:
+        if not chart.events:
+            raise InvalidConfig('journal requires a statechart with events')
+        if segment_size < RECORD.size or buffer_size < RECORD.size:
+            raise InvalidConfig('journal sizes must fit a record')
+        self.directory = directory
+        self.chart = chart
+        self.segment_size = segment_size - segment_size % RECORD.size
+        self.buffer_size = buffer_size - buffer_size % RECORD.size
+        self.sync_every = sync_every
+        self.__buffer = bytearray()
+        self.__writes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.events: list[str] = self.__load_events()
+        self.__ids = {x: i for i, x in enumerate(self.events)}
+        segments = self.segments()
+        self.__segment = len(segments) - 1 if segments else 0
+        self.__file = open(  # pylint: disable=consider-using-with
+            os.path.join(directory, SEGMENT.format(self.__segment)), 'ab'
+        )
+        self.__size = self.__file.tell()
+        if self.__size % RECORD.size:
+            # drop a record torn by a crash during write
+            self.__size -= self.__size % RECORD.size
+            self.__file.truncate(self.__size)
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Record]:
+        return self.read()
+
+    def segments(self) -> list[str]:
+        """Return paths of journal segments in order."""
+        return sorted(
+            os.path.join(self.directory, x)
+            for x in os.listdir(self.directory)
+            if x.startswith('journal-') and x.endswith('.log')
+        )
+
+    def append(
+        self,
+        machine: int,
+        event: int,
+        timestamp: Optional[float] = None,
+        payload: int = -1,
+    ) -> None:
+        """Buffer a record of event by journal id accepted by machine."""
+        self.__buffer += RECORD.pack(
+            machine,
+            event,
+            time.time() if timestamp is None else timestamp,
+            payload,
+        )
+        if len(self.__buffer) >= self.buffer_size:
+            self.flush()
+
+    def extend(self, records: Iterable[tuple[int, int, float, int]]) -> None:
+        """Buffer many records at once."""
+        pack = RECORD.pack
+        buffer = self.__buffer
+        for record in records:
+            buffer += pack(*record)
+            if len(buffer) >= self.buffer_size:
+                self.flush()
+
+    def record(self, machine: int, event: Event, payload: int = -1) -> None:
+        """Buffer a record of event by name or chart id accepted now."""
+        if isinstance(event, int):
+            event = self.chart.events[event]
+        self.append(machine, self.intern(event), None, payload)
+
+    def intern(self, event: str) -> int:
+        """Return the journal id of event, adding it to the vocabulary."""
+        index = self.__ids.get(event)
+        if index is None:
+            # names are durable before any record refers to them
+            self.__write_events([event])
+            index = self.__ids[event] = len(self.events)
+            self.events.append(event)
+        return index
+
+    def attach(self, machine: StateChart, key: int) -> Callable:
+        """Record each event machine accepts under key."""
+        append = self.append
+        intern = self.intern
+
+        def observer(_machine: StateChart, event: str) -> None:
+            # eventless transitions are taken again on replay
+            if event != '':
+                append(key, intern(event))
+
+        machine.subscribe(observer)
+        return observer
+
+    def flush(self) -> None:
+        """Write buffered records and fsync if the group is complete."""
+        offset = 0
+        with memoryview(self.__buffer) as view:
+            while offset < len(view):
+                room = self.segment_size - self.__size
+                if room <= 0:
+                    self.__rotate()
+                    continue
+                with view[offset : offset + room] as chunk:
+                    self.__file.write(chunk)
+                    self.__size += len(chunk)
+                    offset += len(chunk)
+        self.__buffer.clear()
+        self.__writes += 1
+        if self.__writes >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write buffered records and fsync the current segment."""
+        if self.__buffer:
+            self.__writes = self.sync_every
+            self.flush()
+            return
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__writes = 0
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        if not self.__file.closed:
+            self.sync()
+            self.__file.close()
+
+    def read(self) -> Iterator[Record]:
+        """Iterate records written to every segment by journal id."""
+        for chunk in self.chunks():
+            for record in RECORD.iter_unpack(chunk):
+                yield Record(*record)
+
+    def chunks(self) -> Iterator[bytes]:
+        """Iterate raw record bytes of each segment."""
+        if not self.__file.closed:
+            self.sync()
+        for path in self.segments():
+            with open(path, 'rb') as file:
+                data = file.read()
+            # drop a record torn by a crash during write
+            yield data[: len(data) - len(data) % RECORD.size]
+
+    def replay(
+        self,
+        machines: Optional[dict[int, StateChart]] = None,
+        factory: Optional[Callable[[], StateChart]] = None,
+        actions: bool = True,
+        guards: bool = True,
+    ) -> dict[int, StateChart]:
+        """Apply recorded events to machines by key.
+
+        Machines missing from ``machines`` are created with ``factory``,
+        which defaults to the journal statechart. Without ``actions`` the
+        machines are fast-forwarded, skipping their actions and optionally
+        their guards.
+        """
+        machines = {} if machines is None else machines
+        factory = factory or self.chart
+        # events are sent by name as ids of the chart may differ
+        names = self.events
+        if actions:
+            for chunk in self.chunks():
+                for key, event, _, _ in RECORD.iter_unpack(chunk):
+                    if key not in machines:
+                        machines[key] = factory()
+                    machines[key].trigger(names[event])
+            return machines
+        batches: dict[int, list[Event]] = {}
+        for chunk in self.chunks():
+            for key, event, _, _ in RECORD.iter_unpack(chunk):
+                batch = batches.get(key)
+                if batch is None:
+                    batch = batches[key] = []
+                batch.append(names[event])
+        for key, batch in batches.items():
+            if key not in machines:
+                machines[key] = factory()
+            machines[key].fast_forward(batch, guards)
+        return machines
+
+    def __load_events(self) -> list[str]:
+        # read the vocabulary or start it with the events of the chart
+        path = os.path.join(self.directory, VOCABULARY)
+        if not os.path.exists(path):
+            self.__write_events(self.chart.events)
+            return list(self.chart.events)
+        with open(path, 'rb+') as file:
+            data = file.read()
+            # drop a name torn by a crash during write
+            end = data.rfind(b'\n') + 1
+            file.truncate(end)
+        return [json.loads(x) for x in data[:end].splitlines()]
+
+    def __write_events(self, events: Iterable[str]) -> None:
+        path = os.path.join(self.directory, VOCABULARY)
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(x) + '\n' for x in events))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def __rotate(self) -> None:
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__file.close()
+        self.__segment += 1
+        self.__file = open(  # pylint: disable=consider-using-with
+            os.path.join(self.directory, SEGMENT.format(self.__segment)),
+            'ab',
+        )
+        self.__size = 0
+        self.__writes = 0
+        log.info('rotated journal to segment %d', self.__segment)
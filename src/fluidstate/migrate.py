@@ -0,0 +1,151 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Move running machines to a new version of their statechart."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Hashable, Iterable, Mapping
+from typing import NamedTuple, Optional
+
+from . import InvalidConfig, InvalidState, State, StateChart
+
+__all__ = ('Migration', 'Migrator')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class Migration(NamedTuple):
+    """Summarize a migration.
+
+    Missing machines were in states without a counterpart in the new chart
+    and are left unchanged, keyed by their position or fleet key. Unmapped
+    are the statepaths of the old chart without a counterpart.
+    """
+
+    migrated: int
+    missing: dict[Hashable, StateChart]
+    unmapped: tuple[str, ...]
+
+
+class Migrator:
+    """Map the states of a statechart to those of a new version.
+
+    States are matched by statepath unless ``mapping`` gives another
+    statepath or None for states that no longer exist. Machines keep their
+    extended state, observers and delayed events, and are moved state by
+    state rather than one at a time.
+    """
+
+    def __init__(
+        self,
+        old: type[StateChart],
+        new: type[StateChart],
+        mapping: Optional[Mapping[str, Optional[str]]] = None,
+    ) -> None:
+        if not old.transition_table or not new.transition_table:
+            raise InvalidConfig('migration requires statecharts with states')
+        # machines can only change class when their layouts agree
+        try:
+            object.__new__(old).__class__ = new
+        except TypeError as err:
+            raise InvalidConfig(
+                'statecharts must declare the same fields to migrate'
+            ) from err
+        old.materialize()
+        new.materialize()
+        self.old = old
+        self.new = new
+        sources = {x.path: x for x in old.main}
+        paths = {x.path: x for x in new.main}
+        self.targets: dict[int, Optional[State]] = {
+            id(x): paths.get(x.path) for x in sources.values()
+        }
+        for source, target in (mapping or {}).items():
+            state = self.__resolve(old, sources, source)
+            self.targets[id(state)] = (
+                self.__resolve(new, paths, target)
+                if target is not None
+                else None
+            )
+        self.unmapped = tuple(
+            x.path for x in sources.values() if self.targets[id(x)] is None
+        )
+
+    def target(self, state: State) -> Optional[State]:
+        """Return the state of the new chart replacing state."""
+        return self.targets.get(id(state))
+
+    def migrate(
+        self, machines: Iterable[StateChart], run_entry: bool = False
+    ) -> Migration:
+        """Move machines to the new chart and report those left behind.
+
+        Entry actions of the new states are run once machines are moved
+        when ``run_entry`` is set.
+        """
+        groups: dict[int, list[StateChart]] = {}
+        missing: dict[Hashable, StateChart] = {}
+        targets = self.targets
+        for index, machine in enumerate(machines):
+            state = id(machine.state)
+            if targets.get(state) is None:
+                missing[index] = machine
+                continue
+            group = groups.get(state)
+            if group is None:
+                group = groups[state] = []
+            group.append(machine)
+        return self._apply(groups, missing, run_entry)
+
+    def _apply(
+        self,
+        groups: Mapping[int, list[StateChart]],
+        missing: dict[Hashable, StateChart],
+        run_entry: bool = False,
+    ) -> Migration:
+        # move machines grouped by the identity of their current state
+        migrated = 0
+        for state, group in groups.items():
+            target = self.targets[state]
+            if target is None:
+                raise InvalidState('machines are in a state that was removed')
+            self.new._migrate(group, target, self.targets)
+            migrated += len(group)
+        if run_entry:
+            for group in groups.values():
+                self.new._run_initial_entry(group)
+        log.info(
+            'migrated %d machines to %s, %d missing',
+            migrated,
+            self.new.__name__,
+            len(missing),
+        )
+        return Migration(migrated, missing, self.unmapped)
+
+    @staticmethod
+    def __resolve(
+        chart: type[StateChart], paths: dict[str, State], statepath: str
+    ) -> State:
+        if statepath in paths:
+            return paths[statepath]
+        return chart._find_state(statepath, chart.main)
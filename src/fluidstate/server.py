@@ -0,0 +1,498 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Host machines for other processes over a local socket.
+
+Messages are framed by a four byte big-endian length. A request holds an
+opcode, a request id and fields, and a response holds the request id, a
+status and a text body. Strings are prefixed by a two byte length, event
+ids are sent as integers and keyword arguments of events as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import struct
+import sys
+import zlib
+from collections.abc import Sequence
+from itertools import count
+from typing import Any, Optional, Union
+
+from . import Buffer, Event, FluidstateException, Result, StateChart
+
+__all__ = ('Client', 'RemoteError', 'Server', 'main')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# request opcodes
+CREATE = 1
+TRIGGER = 2
+STATE = 3
+REMOVE = 4
+
+# response status of requests other than triggers and of failures
+OK = 0
+ERROR = 255
+
+# tags of event fields
+NAME = 0
+ID = 1
+
+HEADER = struct.Struct('!I')
+REQUEST = struct.Struct('!BI')
+RESPONSE = struct.Struct('!IB')
+LENGTH = struct.Struct('!H')
+INDEX = struct.Struct('!BI')
+
+# largest frame accepted from a peer
+MAXSIZE = 1 << 20
+
+Key = tuple[str, str]
+
+
+class RemoteError(FluidstateException):
+    """Report a request the server could not process."""
+
+
+def _pack(*values: str) -> bytes:
+    # encode strings prefixed by their length
+    parts = []
+    for value in values:
+        data = value.encode()
+        parts.append(LENGTH.pack(len(data)) + data)
+    return b''.join(parts)
+
+
+def _unpack(data: bytes, offset: int, n: int) -> tuple[list[str], int]:
+    values = []
+    for _ in range(n):
+        (size,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        values.append(data[offset : offset + size].decode())
+        offset += size
+    return values, offset
+
+
+def _frames(buffer: bytearray) -> list[bytes]:
+    # remove every complete frame from the front of buffer
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size:
+        (size,) = HEADER.unpack_from(buffer, offset)
+        if size > MAXSIZE:
+            raise RemoteError(f"frame exceeds {MAXSIZE} bytes")
+        end = offset + HEADER.size + size
+        if len(buffer) < end:
+            break
+        frames.append(bytes(buffer[offset + HEADER.size : end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+def _frame(data: bytes) -> bytes:
+    return HEADER.pack(len(data)) + data
+
+
+class Server:
+    """Serve a registry of machines of one or more statecharts.
+
+    Machines are keyed by the name of their chart and a key. Requests read
+    together from a connection are processed as a batch in which events
+    for the same machine are dispatched one after the other and buffered
+    actions are flushed once. Machines are only used from the event loop
+    of the server.
+    """
+
+    def __init__(self, *charts: type[StateChart]) -> None:
+        self.charts = {x.__name__: x for x in charts}
+        self.machines: dict[Key, StateChart] = {}
+        self.__server: Optional[asyncio.Server] = None
+
+    def add(self, key: str, machine: StateChart) -> None:
+        """Register machine under key and the name of its chart."""
+        name = machine.__class__.__name__
+        if self.charts.get(name) is not machine.__class__:
+            raise RemoteError(f"statechart is not served: {name}")
+        self.machines[(name, key)] = machine
+
+    @property
+    def address(self) -> Any:
+        """Return the address the server listens on."""
+        if self.__server is None:
+            return None
+        return self.__server.sockets[0].getsockname()
+
+    async def start(
+        self,
+        path: Optional[str] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ) -> None:
+        """Listen on a Unix domain socket at path or on host and port."""
+        if path is not None:
+            self.__server = await asyncio.start_unix_server(
+                self.__handle, path
+            )
+        else:
+            self.__server = await asyncio.start_server(
+                self.__handle, host, port
+            )
+        log.info('serving statecharts on %s', self.address)
+
+    async def serve_forever(self) -> None:
+        """Process requests until cancelled."""
+        if self.__server is None:
+            raise RemoteError('server has not been started')
+        await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections."""
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                frames = _frames(buffer)
+                if frames:
+                    writer.write(b''.join(self.process(frames)))
+                    await writer.drain()
+        except (ConnectionError, RemoteError) as err:
+            log.warning('closing connection: %s', err)
+        finally:
+            writer.close()
+
+    def process(self, frames: list[bytes]) -> list[bytes]:
+        """Process request frames and return their response frames.
+
+        Requests that cannot be processed are answered with an error, while
+        frames too short to hold a request id raise ``RemoteError``.
+        """
+        responses: list[bytes] = []
+        batches: dict[Key, list[tuple[int, Event, dict[str, Any]]]] = {}
+        for frame in frames:
+            if len(frame) < REQUEST.size:
+                # a request without its id cannot be answered
+                raise RemoteError('request frame is too short')
+            opcode, rid = REQUEST.unpack_from(frame)
+            try:
+                (name, key), offset = _unpack(frame, REQUEST.size, 2)
+                if opcode == TRIGGER:
+                    tag, index = INDEX.unpack_from(frame, offset)
+                    offset += INDEX.size
+                    event: Event = index
+                    if tag == NAME:
+                        (event,), offset = _unpack(frame, offset, 1)
+                    payload = frame[offset:]
+                    kwargs = json.loads(payload) if payload else {}
+                    batches.setdefault((name, key), []).append(
+                        (rid, event, kwargs)
+                    )
+                    continue
+                # other requests observe the events received before them
+                self.__dispatch(batches, responses)
+                (initial,), _ = _unpack(frame, offset, 1)
+                body = self.__request(opcode, (name, key), initial)
+                responses.append(self.__response(rid, OK, body))
+            except Exception as err:  # pylint: disable=broad-except
+                responses.append(self.__response(rid, ERROR, str(err)))
+        self.__dispatch(batches, responses)
+        return responses
+
+    def __dispatch(
+        self,
+        batches: dict[Key, list[tuple[int, Event, dict[str, Any]]]],
+        responses: list[bytes],
+    ) -> None:
+        # dispatch events of each machine in the order they were received
+        if not batches:
+            return
+        with Buffer.batch():
+            for key, events in batches.items():
+                machine = self.machines.get(key)
+                for rid, event, kwargs in events:
+                    if machine is None:
+                        responses.append(
+                            self.__response(
+                                rid, ERROR, f"machine not found: {key}"
+                            )
+                        )
+                        continue
+                    try:
+                        result = machine.try_trigger(event, **kwargs)
+                    except Exception as err:  # pylint: disable=broad-except
+                        responses.append(self.__response(rid, ERROR, str(err)))
+                    else:
+                        responses.append(
+                            self.__response(rid, result, machine.state.path)
+                        )
+        batches.clear()
+
+    def __request(self, opcode: int, key: Key, initial: str) -> str:
+        if opcode == CREATE:
+            if key in self.machines:
+                raise RemoteError(f"machine already registered: {key}")
+            if key[0] not in self.charts:
+                raise RemoteError(f"statechart is not served: {key[0]}")
+            created = self.charts[key[0]](initial or None)
+            self.machines[key] = created
+            return created.state.path
+        machine = self.machines.get(key)
+        if machine is None:
+            raise RemoteError(f"machine not found: {key}")
+        if opcode == STATE:
+            return machine.state.path
+        if opcode == REMOVE:
+            del self.machines[key]
+            return machine.state.path
+        raise RemoteError(f"unknown opcode: {opcode}")
+
+    @staticmethod
+    def __response(rid: int, status: int, body: str) -> bytes:
+        return _frame(RESPONSE.pack(rid, status) + body.encode())
+
+
+class _Connection:
+    # match pipelined responses of one connection to their requests
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.counter = count()
+        self.futures: dict[int, asyncio.Future] = {}
+        self.task = asyncio.ensure_future(self.receive())
+
+    def send(self, opcode: int, body: bytes) -> asyncio.Future:
+        rid = next(self.counter) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.futures[rid] = future
+        self.writer.write(_frame(REQUEST.pack(opcode, rid) + body))
+        return future
+
+    async def receive(self) -> None:
+        buffer = bytearray()
+        error: Exception = RemoteError('connection closed')
+        try:
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                for frame in _frames(buffer):
+                    rid, status = RESPONSE.unpack_from(frame)
+                    future = self.futures.pop(rid, None)
+                    if future is not None and not future.done():
+                        future.set_result(
+                            (status, frame[RESPONSE.size :].decode())
+                        )
+        except (ConnectionError, RemoteError) as err:
+            error = err
+        finally:
+            for future in self.futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.futures.clear()
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.task
+
+
+class Client:
+    """Send requests to a server over a pool of connections.
+
+    Requests for the same machine always use the same connection so they
+    are processed in order. Requests are pipelined, so several may be in
+    flight on a connection and ``trigger_many`` writes every event before
+    waiting for the first response.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        host: str = '127.0.0.1',
+        port: Optional[int] = None,
+        size: int = 1,
+    ) -> None:
+        if path is None and port is None:
+            raise RemoteError('client requires a socket path or port')
+        self.path = path
+        self.host = host
+        self.port = port
+        self.size = size
+        self.__pool: list[_Connection] = []
+
+    async def __aenter__(self) -> Client:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """Open the connections of the pool."""
+        while len(self.__pool) < self.size:
+            if self.path is not None:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            else:
+                reader, writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            self.__pool.append(_Connection(reader, writer))
+
+    async def close(self) -> None:
+        """Close the connections of the pool."""
+        pool, self.__pool = self.__pool, []
+        for connection in pool:
+            await connection.close()
+
+    async def create(
+        self, chart: str, key: str, initial: Optional[str] = None
+    ) -> str:
+        """Create a machine on the server and return its statepath."""
+        return await self.__call(CREATE, chart, key, initial or '')
+
+    async def state(self, chart: str, key: str) -> str:
+        """Return the statepath of a machine."""
+        return await self.__call(STATE, chart, key, '')
+
+    async def remove(self, chart: str, key: str) -> str:
+        """Remove a machine from the server and return its statepath."""
+        return await self.__call(REMOVE, chart, key, '')
+
+    async def trigger(
+        self, chart: str, key: str, event: Event, **kwargs: Any
+    ) -> Result:
+        """Send event to a machine and return the outcome."""
+        connection = self.__connection(chart, key)
+        future = connection.send(
+            TRIGGER, self.__event(chart, key, event, kwargs)
+        )
+        await connection.writer.drain()
+        return self.__result(*await future)
+
+    async def trigger_many(
+        self,
+        chart: str,
+        key: str,
+        events: Sequence[Union[Event, tuple[Event, dict[str, Any]]]],
+    ) -> list[Result]:
+        """Send events to a machine at once and return their outcomes.
+
+        Events may be paired with their keyword arguments.
+        """
+        connection = self.__connection(chart, key)
+        futures = []
+        for item in events:
+            event, kwargs = item if isinstance(item, tuple) else (item, {})
+            futures.append(
+                connection.send(
+                    TRIGGER, self.__event(chart, key, event, kwargs)
+                )
+            )
+        await connection.writer.drain()
+        return [self.__result(*x) for x in await asyncio.gather(*futures)]
+
+    def __connection(self, chart: str, key: str) -> _Connection:
+        if not self.__pool:
+            raise RemoteError('client is not connected')
+        index = zlib.crc32(f"{chart}:{key}".encode()) % len(self.__pool)
+        return self.__pool[index]
+
+    async def __call(
+        self, opcode: int, chart: str, key: str, value: str
+    ) -> str:
+        connection = self.__connection(chart, key)
+        future = connection.send(opcode, _pack(chart, key, value))
+        await connection.writer.drain()
+        status, body = await future
+        if status == ERROR:
+            raise RemoteError(body)
+        return body
+
+    @staticmethod
+    def __event(
+        chart: str, key: str, event: Event, kwargs: dict[str, Any]
+    ) -> bytes:
+        if isinstance(event, int):
+            field = INDEX.pack(ID, event)
+        else:
+            field = INDEX.pack(NAME, 0) + _pack(event)
+        payload = json.dumps(kwargs).encode() if kwargs else b''
+        return _pack(chart, key) + field + payload
+
+    @staticmethod
+    def __result(status: int, body: str) -> Result:
+        if status == ERROR:
+            raise RemoteError(body)
+        return Result(status)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Serve statecharts from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m fluidstate.server', description=__doc__
+    )
+    parser.add_argument('charts', nargs='+', help='statechart as module:class')
+    parser.add_argument('--socket', help='path of a Unix domain socket')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    charts = []
+    for setting in args.charts:
+        module, _, name = setting.partition(':')
+        charts.append(getattr(importlib.import_module(module), name))
+    server = Server(*charts)
+
+    async def serve() -> None:
+        await server.start(args.socket, args.host, args.port)
+        sys.stdout.write(f"serving on {server.address}\n")
+        sys.stdout.flush()
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Schedule delayed events with a hierarchical timing wheel."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Optional, Union
+
+__all__ = ('MonotonicClock', 'Timer', 'TimerWheel', 'VirtualClock')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class MonotonicClock:
+    """Provide wall clock time that cannot go backwards."""
+
+    def time(self) -> float:
+        """Return current time in seconds."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Block for seconds."""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Provide simulated time that only moves when advanced."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def time(self) -> float:
+        """Return current time in seconds."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Advance time instead of blocking."""
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """Move time forward by seconds."""
+        self.now += seconds
+
+
+Clock = Union[MonotonicClock, VirtualClock]
+
+
+class Timer:
+    """Represent a callback scheduled on a timing wheel."""
+
+    __slots__ = ('expires', 'callback', 'args', 'active', '_wheel')
+
+    def __init__(
+        self,
+        expires: int,
+        callback: Callable,
+        args: tuple[Any, ...],
+        wheel: TimerWheel,
+    ) -> None:
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.active = True
+        self._wheel = wheel
+
+    def __repr__(self) -> str:
+        return repr(f"Timer(expires={self.expires}, active={self.active})")
+
+    def cancel(self) -> None:
+        """Prevent the callback from running if it has not yet."""
+        if self.active:
+            self._wheel._discard(self)
+
+
+class TimerWheel:
+    """Schedule callbacks on a hierarchical timing wheel.
+
+    Time is divided into ticks of ``resolution`` seconds. Each level of the
+    wheel has ``slots`` buckets, each spanning all the buckets of the level
+    below, so scheduling and cancelling are constant time regardless of the
+    number of pending timers. Timers are fired by ``poll`` in order of
+    expiry using the time reported by ``clock``.
+
+    The wheel may be shared by machines on several threads. Its buckets are
+    updated under a lock and callbacks run outside of it, so a callback may
+    schedule timers and other threads are not blocked while it runs.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.01,
+        slots: int = 256,
+        levels: int = 4,
+        clock: Optional[Clock] = None,
+    ) -> None:
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock or MonotonicClock()
+        self.__origin = self.clock.time()
+        self.__current = 0
+        self.__count = 0
+        # tick being fired by the polling thread
+        self.__polling = threading.local()
+        self.__lock = threading.Lock()
+        self.__spans = tuple(slots**x for x in range(levels + 1))
+        self.__wheels: list[list[list[Timer]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def now(self) -> int:
+        """Return the tick reported by the clock."""
+        return int((self.clock.time() - self.__origin) / self.resolution)
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        """Run callback with args after delay in seconds."""
+        # timers scheduled by callbacks are relative to the tick being fired
+        start = getattr(self.__polling, 'tick', None)
+        if start is None:
+            start = self.now
+        ticks = max(1, math.ceil(delay / self.resolution))
+        with self.__lock:
+            timer = Timer(
+                max(start + ticks, self.__current + 1), callback, args, self
+            )
+            self.__insert(timer)
+            self.__count += 1
+        return timer
+
+    def poll(self) -> int:
+        """Fire timers that expired up to now and return the number fired."""
+        target = self.now
+        fired = 0
+        try:
+            while True:
+                with self.__lock:
+                    if self.__current >= target:
+                        break
+                    if not self.__count:
+                        self.__current = target
+                        break
+                    self.__current += 1
+                    self.__cascade()
+                    tick = self.__current
+                    due = self.__collect()
+                self.__polling.tick = tick
+                for timer in due:
+                    try:
+                        timer.callback(*timer.args)
+                    except Exception:  # pylint: disable=broad-except
+                        log.exception('timer callback failed')
+                fired += len(due)
+        finally:
+            self.__polling.tick = None
+        return fired
+
+    def run(self, duration: float) -> int:
+        """Poll timers for duration seconds and return the number fired."""
+        end = self.clock.time() + duration
+        fired = self.poll()
+        while self.clock.time() < end:
+            self.clock.sleep(min(self.resolution, end - self.clock.time()))
+            fired += self.poll()
+        return fired
+
+    def _discard(self, timer: Timer) -> None:
+        with self.__lock:
+            if timer.active:
+                timer.active = False
+                self.__count -= 1
+
+    def __insert(self, timer: Timer) -> None:
+        delta = timer.expires - self.__current
+        for level in range(self.levels):
+            if delta < self.__spans[level + 1]:
+                break
+        # timers beyond the last level are reinserted when it cascades
+        index = (timer.expires // self.__spans[level]) % self.slots
+        self.__wheels[level][index].append(timer)
+
+    def __cascade(self) -> None:
+        for level in range(1, self.levels):
+            if self.__current % self.__spans[level]:
+                break
+            wheel = self.__wheels[level]
+            index = (self.__current // self.__spans[level]) % self.slots
+            bucket, wheel[index] = wheel[index], []
+            for timer in bucket:
+                if timer.active:
+                    self.__insert(timer)
+
+    def __collect(self) -> list[Timer]:
+        # take timers due at the current tick off the wheel
+        wheel = self.__wheels[0]
+        index = self.__current % self.slots
+        bucket, wheel[index] = wheel[index], []
+        due = []
+        for timer in bucket:
+            if not timer.active:
+                continue
+            if timer.expires > self.__current:
+                self.__insert(timer)
+                continue
+            timer.active = False
+            self.__count -= 1
+            due.append(timer)
+        return due
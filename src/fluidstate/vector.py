@@ -0,0 +1,206 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Replay per-entity event logs over arrays with NumPy."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, NamedTuple, Optional
+
+from . import InvalidConfig, State, StateChart
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+__all__ = ('Replay', 'Vectorizer')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class Replay(NamedTuple):
+    """Provide the states reached by replaying an event table.
+
+    Row columns hold the state index after each event, whether the event
+    applied and whether it depended on a guard. Entity columns hold each
+    entity in order of appearance with the index of its final state.
+    """
+
+    states: Any
+    applied: Any
+    guarded: Any
+    entities: Any
+    finals: Any
+
+
+class Vectorizer:
+    """Apply the transition table of a statechart to arrays of events.
+
+    The table is flattened into a matrix of target state indices by state
+    and event id, following eventless transitions of each target. Events
+    are applied to all entities at once, one position of their logs at a
+    time, so the number of steps is the length of the longest log.
+
+    Transitions decided by constant guards are resolved exactly. Where a
+    guard must be evaluated the first candidate is taken, as if the event
+    was accepted when recorded, and the row is flagged as guarded.
+    """
+
+    def __init__(
+        self, chart: type[StateChart], initial: Optional[str] = None
+    ) -> None:
+        if np is None:
+            raise ImportError('numpy is required for vectorized replay')
+        if not chart.transition_table:
+            raise InvalidConfig('replay requires a statechart with states')
+        # every region is built so the whole chart is indexed
+        chart.materialize()
+        self.chart = chart
+        self.__states = tuple(chart.main)
+        self.__index = {id(x): i for i, x in enumerate(self.__states)}
+        self.paths = tuple(x.path for x in self.__states)
+        current = initial or chart.main.initial
+        if callable(current):
+            raise InvalidConfig('replay requires a named initial state')
+        if current in self.paths:
+            state = self.__states[self.paths.index(current)]
+        elif current:
+            state = chart._find_state(current, chart.main)
+        elif chart.main.substates:
+            state = chart.main.substates[0]
+        else:
+            state = chart.main
+        # eventless transitions are taken on entry of the initial state
+        state, _ = self.__follow(state)
+        self.initial = self.__index[id(state)]
+        shape = (len(self.__states), len(chart.events))
+        self.table = np.full(shape, -1, dtype=np.int32)
+        self.guarded = np.zeros(shape, dtype=bool)
+        for i, source in enumerate(self.__states):
+            for j, event in enumerate(chart.events):
+                target, guarded = self.__resolve(source, event)
+                if target is not None:
+                    target, follow = self.__follow(target)
+                    self.table[i, j] = self.__index[id(target)]
+                    guarded = guarded or follow
+                self.guarded[i, j] = guarded
+
+    def replay(self, entities: Any, events: Any) -> Replay:
+        """Replay event ids for entities grouped in order of time.
+
+        Rows of the same entity must be contiguous. Each entity starts in
+        the initial state and events that do not apply leave it unchanged.
+        """
+        entities = np.asarray(entities)
+        events = np.asarray(events, dtype=np.intp)
+        if entities.shape != events.shape or entities.ndim != 1:
+            raise InvalidConfig('entities and events must be matching rows')
+        rows = len(events)
+        states = np.empty(rows, dtype=np.int32)
+        applied = np.zeros(rows, dtype=bool)
+        guarded = np.zeros(rows, dtype=bool)
+        if not rows:
+            return Replay(
+                states, applied, guarded, entities[:0], states[:0].copy()
+            )
+        if events.min() < 0 or events.max() >= self.table.shape[1]:
+            raise InvalidConfig('event ids are outside the chart vocabulary')
+
+        # segment rows by entity
+        starts = np.flatnonzero(
+            np.concatenate(([True], entities[1:] != entities[:-1]))
+        )
+        lengths = np.diff(np.append(starts, rows))
+        unique = entities[starts]
+        if len(np.unique(unique)) != len(unique):
+            raise InvalidConfig('events must be grouped by entity')
+
+        # longest segments first so active ones form a shrinking prefix
+        order = np.argsort(-lengths, kind='stable')
+        remaining = lengths[order]
+        current = np.full(len(starts), self.initial, dtype=np.int32)
+        for step in range(int(remaining[0])):
+            active = order[: np.searchsorted(-remaining, -step, 'left')]
+            position = starts[active] + step
+            source = current[active]
+            event = events[position]
+            target = self.table[source, event]
+            moved = target >= 0
+            target = np.where(moved, target, source)
+            current[active] = target
+            states[position] = target
+            applied[position] = moved
+            guarded[position] = self.guarded[source, event]
+        log.info('replayed %d events of %d entities', rows, len(starts))
+        return Replay(states, applied, guarded, unique, current)
+
+    def decode(self, states: Any) -> list[str]:
+        """Return statepaths of state indices."""
+        paths = self.paths
+        return [paths[x] for x in np.asarray(states).tolist()]
+
+    def __resolve(
+        self, state: State, event: str
+    ) -> tuple[Optional[State], bool]:
+        # select the transition taken for event and whether guards decide
+        if state.type == 'final':
+            return None, False
+        candidates = self.chart.transition_table[id(state)].get(event)
+        if not candidates:
+            return None, False
+        if any(
+            not isinstance(y.condition, bool)
+            for x in candidates.transitions
+            for y in x.cond
+        ):
+            route = candidates.routes[0]
+            return (route.target(state) if route else None), True
+        allowed = [
+            i
+            for i, x in enumerate(candidates.transitions)
+            if all(y.condition for y in x.cond)
+        ]
+        if not allowed:
+            return None, False
+        if (
+            len(allowed) > 1
+            and not candidates.exclusive
+            and getattr(self.chart, '__selection__', 'strict') == 'strict'
+        ):
+            # dispatch would fork so the event is flagged without applying
+            return None, True
+        route = candidates.routes[allowed[0]]
+        return (route.target(state) if route else None), route is None
+
+    def __follow(self, target: State) -> tuple[State, bool]:
+        # take eventless transitions entered with the target state
+        guarded = False
+        for _ in range(len(self.__states)):
+            if id(target) not in self.chart.eventless:
+                break
+            following, flag = self.__resolve(target, '')
+            guarded = guarded or flag
+            if following is None:
+                break
+            target = following
+        return target, guarded
@@ -0,0 +1,322 @@
+# Copyright (c) 2022 Jesse P. Johnson
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Generate synthetic event streams and measure statechart throughput."""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import random
+import sys
+import time
+from array import array
+from collections.abc import Hashable, Sequence
+from typing import Any, NamedTuple, Optional, Union
+
+from . import InvalidConfig, Result, StateChart
+from .fleet import Fleet
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+__all__ = ('Stats', 'Workload', 'main')
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# event sent as noise when every event of the chart is enabled
+NOISE = '__noise__'
+
+Target = Union[StateChart, Sequence[StateChart], Fleet]
+
+
+class Stats(NamedTuple):
+    """Summarize a workload run.
+
+    Latencies are in microseconds and memory is the growth of peak resident
+    set size in kilobytes, or None where it cannot be measured.
+    """
+
+    machines: int
+    events: int
+    applied: int
+    rejected: int
+    restarted: int
+    duration: float
+    throughput: float
+    p50: float
+    p99: float
+    p999: float
+    memory: Optional[int]
+
+    def to_json(self) -> str:
+        """Return the statistics as a JSON document."""
+        return json.dumps(self._asdict(), indent=2)
+
+    def write(self, path: str) -> None:
+        """Write the statistics to path as JSON."""
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.to_json())
+
+
+class Workload:
+    """Drive machines with random walks over their enabled events.
+
+    Each event is drawn from those with a transition from the current state
+    of a machine, weighted by ``weights`` which default to one. With a
+    probability of ``noise`` an event that is not enabled is sent instead.
+    Machines left without enabled events are replaced by new ones when
+    ``restart`` is set, and otherwise no longer receive events. Restarting
+    raises ``InvalidConfig`` when new machines have no enabled events.
+    """
+
+    def __init__(
+        self,
+        chart: type[StateChart],
+        weights: Optional[dict[str, float]] = None,
+        noise: float = 0.0,
+        restart: bool = True,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not chart.transition_table:
+            raise InvalidConfig('workload requires a statechart with states')
+        if not 0 <= noise <= 1:
+            raise InvalidConfig('noise must be a probability')
+        self.chart = chart
+        self.weights = weights or {}
+        self.noise = noise
+        self.restart = restart
+        self.random = random.Random(seed)
+        self.__choices: dict[
+            int, tuple[tuple[str, ...], list[float], tuple[str, ...]]
+        ] = {}
+
+    def enabled(self, machine: StateChart) -> tuple[str, ...]:
+        """Return events with a transition from the state of machine."""
+        return self.__lookup(machine)[0]
+
+    def next_event(self, machine: StateChart) -> Optional[str]:
+        """Draw the next event for machine or None if it has none."""
+        events, weights, invalid = self.__lookup(machine)
+        if self.noise and self.random.random() < self.noise:
+            return self.random.choice(invalid) if invalid else NOISE
+        if not events:
+            return None
+        return self.random.choices(events, weights)[0]
+
+    def run(
+        self,
+        target: Target,
+        events: Optional[int] = None,
+        duration: Optional[float] = None,
+        rate: Optional[float] = None,
+    ) -> Stats:
+        """Send events to target and measure how they are processed.
+
+        Target is a machine, a sequence of machines or a fleet. Each event
+        goes to a machine chosen at random. The run stops after ``events``
+        events or ``duration`` seconds, and is paced to ``rate`` events per
+        second when given.
+        """
+        if events is None and duration is None:
+            raise InvalidConfig(
+                'workload requires a number of events or duration'
+            )
+        fleet = None
+        if isinstance(target, Fleet):
+            fleet = target
+            keys: list[Hashable] = list(fleet)
+            machines = [fleet[x] for x in keys]
+        elif isinstance(target, StateChart):
+            keys, machines = [0], [target]
+        else:
+            machines = list(target)
+            keys = list(range(len(machines)))
+        live = list(range(len(machines)))
+        latencies = array('q')
+        applied = rejected = restarted = 0
+        memory = self.__memory()
+        clock = time.perf_counter
+        timer = time.perf_counter_ns
+        start = clock()
+        end = start + duration if duration is not None else None
+        sent = 0
+        while live and (events is None or sent < events):
+            if rate:
+                delay = start + sent / rate - clock()
+                if delay > 0:
+                    time.sleep(delay)
+            if end is not None and clock() >= end:
+                break
+            slot = self.random.randrange(len(live))
+            index = live[slot]
+            machine = machines[index]
+            event = self.next_event(machine)
+            if event is None:
+                if not self.restart:
+                    live[slot] = live[-1]
+                    live.pop()
+                    continue
+                machine = self.__replace(fleet, keys, index)
+                machines[index] = machine
+                restarted += 1
+                continue
+            begin = timer()
+            result = machine.try_trigger(event)
+            latencies.append(timer() - begin)
+            sent += 1
+            if result == Result.APPLIED:
+                applied += 1
+            else:
+                rejected += 1
+        elapsed = clock() - start
+        growth = self.__memory()
+        ordered = sorted(latencies)
+        stats = Stats(
+            machines=len(machines),
+            events=sent,
+            applied=applied,
+            rejected=rejected,
+            restarted=restarted,
+            duration=elapsed,
+            throughput=sent / elapsed if elapsed else 0.0,
+            p50=self.__percentile(ordered, 0.5),
+            p99=self.__percentile(ordered, 0.99),
+            p999=self.__percentile(ordered, 0.999),
+            memory=(
+                growth - memory
+                if growth is not None and memory is not None
+                else None
+            ),
+        )
+        log.info('workload run complete: %s', stats)
+        return stats
+
+    def __lookup(
+        self, machine: StateChart
+    ) -> tuple[tuple[str, ...], list[float], tuple[str, ...]]:
+        # cache weighted choices for each state
+        state = machine.state
+        key = id(state)
+        if key not in self.__choices:
+            events = tuple(
+                x
+                for x in self.chart.transition_table[key]
+                if x != '' and state.type != 'final'
+            )
+            self.__choices[key] = (
+                events,
+                [self.weights.get(x, 1.0) for x in events],
+                tuple(x for x in self.chart.events if x and x not in events),
+            )
+        return self.__choices[key]
+
+    def __replace(
+        self, fleet: Optional[Fleet], keys: list[Hashable], index: int
+    ) -> StateChart:
+        # swap a machine without enabled events for a new one
+        machine = self.chart()
+        if not self.enabled(machine):
+            # a new machine would be replaced forever without an event sent
+            raise InvalidConfig(
+                f"new {self.chart.__name__} machines have no enabled events"
+            )
+        if fleet is not None:
+            fleet.remove(keys[index])
+            keys[index] = fleet.add(machine)
+        return machine
+
+    @staticmethod
+    def __percentile(ordered: list[int], rank: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(rank * len(ordered)))
+        return ordered[index] / 1000
+
+    @staticmethod
+    def __memory() -> Optional[int]:
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a workload against a statechart from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m fluidstate.workload', description=__doc__
+    )
+    parser.add_argument('chart', help='statechart as module:class')
+    parser.add_argument('--machines', type=int, default=1)
+    parser.add_argument('--fleet', action='store_true')
+    parser.add_argument('--events', type=int)
+    parser.add_argument('--duration', type=float)
+    parser.add_argument('--rate', type=float)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument(
+        '--weight',
+        action='append',
+        default=[],
+        metavar='EVENT=WEIGHT',
+        help='relative probability of an event',
+    )
+    parser.add_argument('--no-restart', action='store_true')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help='write statistics to path')
+    args = parser.parse_args(argv)
+
+    module, _, name = args.chart.partition(':')
+    chart: Any = getattr(importlib.import_module(module), name)
+    weights = {}
+    for setting in args.weight:
+        event, _, weight = setting.partition('=')
+        weights[event] = float(weight)
+    workload = Workload(
+        chart,
+        weights=weights,
+        noise=args.noise,
+        restart=not args.no_restart,
+        seed=args.seed,
+    )
+    target: Target
+    if args.fleet:
+        target = Fleet(chart)
+        target.extend(chart() for _ in range(args.machines))
+    else:
+        target = [chart() for _ in range(args.machines)]
+    stats = workload.run(
+        target,
+        events=args.events,
+        duration=args.duration if args.events or args.duration else 10.0,
+        rate=args.rate,
+    )
+    if args.output:
+        stats.write(args.output)
+    else:
+        sys.stdout.write(stats.to_json() + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
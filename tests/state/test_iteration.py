@@ -1,5 +1,7 @@
 """Demonstrate iterating a statechart."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 from fluidstate import StateChart
 
 
@@ -80,3 +82,18 @@ def test_state_state_paths() -> None:
         'main.start.inter2.inter2_substate1',
         'main.start.inter2.inter2_substate2',
     ]
+
+
+def test_state_nested_iteration() -> None:
+    """Test iterations of a shared state are independent."""
+    pairs = [(x.name, y.name) for x in Nested.main for y in Nested.main]
+    assert len(pairs) == 49
+
+
+def test_state_concurrent_lookup() -> None:
+    """Test threads can look up states of a shared chart at once."""
+    nested = Nested()
+    names = [x.name for x in Nested.main] * 200
+    with ThreadPoolExecutor(8) as pool:
+        found = list(pool.map(lambda x: nested.get_state(x).name, names))
+    assert found == names
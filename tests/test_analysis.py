@@ -0,0 +1,139 @@
+import pytest
+
+from fluidstate import InvalidConfig, InvalidTransition, Result, StateChart
+
+
+class Order(StateChart):
+    __trusted__ = True
+    __statechart__ = {
+        'initial': 'created',
+        'states': [
+            {
+                'name': 'created',
+                'transitions': [
+                    {'event': 'queue', 'target': 'waiting'},
+                    {'event': 'cancel', 'target': 'canceled'},
+                ],
+                'on_exit': 'log_exit',
+            },
+            {
+                'name': 'waiting',
+                'transitions': [
+                    {'event': 'process', 'target': 'processed'},
+                    {'event': 'cancel', 'target': 'canceled'},
+                    {'event': 'requeue', 'target': 'waiting'},
+                ],
+                'on_entry': 'log_entry',
+                'on_exit': 'log_exit',
+            },
+            {'name': 'processed', 'type': 'final'},
+            {'name': 'canceled', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.log = []
+        super().__init__()
+
+    def log_entry(self):
+        self.log.append(f"entry {self.state.name}")
+
+    def log_exit(self):
+        self.log.append(f"exit {self.state.name}")
+
+
+def test_report_is_available_on_chart():
+    report = Order.report
+    assert report.ok
+    assert report.unreachable == ()
+    assert report.dead_ends == ()
+
+
+def test_trusted_dispatch_runs_actions_in_order():
+    order = Order()
+    order.trigger('queue')
+    order.trigger('requeue')
+    order.trigger('process')
+    assert order.state == 'processed'
+    assert order.log == [
+        'exit created',
+        'entry waiting',
+        'exit waiting',
+        'entry waiting',
+        'exit waiting',
+    ]
+
+
+def test_trusted_dispatch_rejects_events_from_final_state():
+    order = Order()
+    order.trigger('cancel')
+    assert order.try_trigger('queue') == Result.FINAL
+    with pytest.raises(InvalidTransition, match='final state'):
+        order.trigger('queue')
+
+
+def test_report_finds_mis_specified_states():
+    class Broken(StateChart):
+        __statechart__ = {
+            'initial': 'start',
+            'states': [
+                {
+                    'name': 'start',
+                    'transitions': [
+                        {'event': 'go', 'target': 'middle'},
+                        {'event': 'go', 'target': 'finish'},
+                        {'event': 'jump', 'target': 'nowhere'},
+                    ],
+                },
+                {'name': 'middle'},
+                {
+                    'name': 'finish',
+                    'type': 'final',
+                    'transitions': [{'event': 'again', 'target': 'start'}],
+                },
+                {'name': 'orphan'},
+            ],
+        }
+
+    report = Broken.report
+    assert not report.ok
+    assert report.unresolved == (('main.start', 'nowhere'),)
+    assert report.ambiguous == (('main.start', 'go'),)
+    assert report.final == (('main.finish', 'again'),)
+    assert report.unreachable == ('main.orphan',)
+    assert report.dead_ends == ('main.middle', 'main.orphan')
+
+
+def test_report_finds_eventless_cycles():
+    class Looping(StateChart):
+        __statechart__ = {
+            'initial': 'ping',
+            'states': [
+                {
+                    'name': 'ping',
+                    'transitions': [{'event': '', 'target': 'pong'}],
+                },
+                {
+                    'name': 'pong',
+                    'transitions': [{'event': '', 'target': 'ping'}],
+                },
+            ],
+        }
+
+    assert Looping.report.cycles == (('main.ping', 'main.pong'),)
+
+
+def test_trusted_chart_must_pass_analysis():
+    with pytest.raises(InvalidConfig):
+
+        class Machine(StateChart):
+            __trusted__ = True
+            __statechart__ = {
+                'states': [
+                    {
+                        'name': 'open',
+                        'transitions': [{'event': 'close', 'target': 'shut'}],
+                    },
+                    {'name': 'closed'},
+                ],
+            }
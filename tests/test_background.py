@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from fluidstate import Action, Background, InvalidConfig, StateChart
+
+
+class Notifier(StateChart):
+    __background__ = Background(workers=4)
+    __statechart__ = {
+        'initial': 'idle',
+        'states': [
+            {
+                'name': 'idle',
+                'transitions': [
+                    {
+                        'event': 'ping',
+                        'target': 'idle',
+                        'action': {'content': 'notify', 'background': True},
+                    }
+                ],
+            },
+            {'name': 'done', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.sent = []
+        super().__init__()
+
+    def notify(self, n=0):
+        time.sleep(0.001)
+        self.sent.append(n)
+
+
+def test_actions_run_in_order_per_machine():
+    machines = [Notifier() for _ in range(4)]
+    for n in range(10):
+        for machine in machines:
+            machine.trigger('ping', n=n)
+    assert Notifier.__background__.drain(timeout=5)
+    for machine in machines:
+        assert machine.sent == list(range(10))
+    assert len(Notifier.__background__) == 0
+
+
+def test_trigger_does_not_wait():
+    release = threading.Event()
+    background = Background(workers=1)
+    action = Action(lambda machine: release.wait(), background=background)
+    action(None)
+    assert len(background) == 1
+    release.set()
+    assert background.drain(timeout=5)
+    background.shutdown()
+
+
+def test_bounded_queue_blocks_submit():
+    release = threading.Event()
+    background = Background(maxsize=1, workers=1)
+    background.submit(object(), release.wait)
+    submitted = threading.Event()
+
+    def submit():
+        background.submit(object(), lambda: None)
+        submitted.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert not submitted.wait(0.05)
+    release.set()
+    assert submitted.wait(5)
+    thread.join()
+    background.shutdown()
+
+
+def test_errors_passed_to_callback():
+    errors = []
+    background = Background(on_error=lambda m, e: errors.append((m, e)))
+    machine = object()
+
+    def fail():
+        raise RuntimeError('sink unavailable')
+
+    background.submit(machine, fail)
+    assert background.drain(timeout=5)
+    assert errors[0][0] is machine
+    assert isinstance(errors[0][1], RuntimeError)
+    background.shutdown()
+
+    with pytest.raises(InvalidConfig):
+        Background(maxsize=0)
+
+
+def test_failing_callback_does_not_stall_machine():
+    def callback(machine, error):
+        raise ValueError(error)
+
+    background = Background(on_error=callback, workers=1)
+    machine = object()
+    ran = []
+
+    def fail():
+        raise RuntimeError('sink unavailable')
+
+    background.submit(machine, fail)
+    background.submit(machine, lambda: ran.append(True))
+    assert background.drain(timeout=5)
+    assert ran == [True]
+    background.shutdown()
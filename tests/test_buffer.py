@@ -0,0 +1,87 @@
+import pytest
+
+from fluidstate import Action, Buffer, InvalidConfig, StateChart
+from fluidstate.fleet import Fleet
+
+flushed = []
+
+
+def write(rows):
+    flushed.append(list(rows))
+
+
+class Counter(StateChart):
+    rows = Buffer(write)
+    __statechart__ = {
+        'initial': 'low',
+        'states': [
+            {
+                'name': 'low',
+                'transitions': [{'event': 'up', 'target': 'high'}],
+                'on_entry': {'content': 'row', 'buffer': 'rows'},
+            },
+            {
+                'name': 'high',
+                'transitions': [{'event': 'down', 'target': 'low'}],
+                'on_entry': {'content': 'row', 'buffer': 'rows'},
+            },
+        ],
+    }
+
+    def row(self):
+        return (id(self), self.state.name)
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    flushed.clear()
+    Counter.rows.history.clear()
+
+
+def test_values_flushed_as_appended_outside_batch():
+    machine = Counter()
+    machine.trigger('up')
+    assert flushed == [[(id(machine), 'low')], [(id(machine), 'high')]]
+
+
+def test_trigger_many_flushes_once():
+    machine = Counter()
+    flushed.clear()
+    machine.trigger_many(['up', 'down', 'up'])
+    assert flushed == [
+        [(id(machine), 'high'), (id(machine), 'low'), (id(machine), 'high')]
+    ]
+    info = Counter.rows.history[-1]
+    assert info.size == 3 and not info.failed and info.latency >= 0
+
+
+def test_broadcast_flushes_once():
+    fleet = Fleet(Counter)
+    with Buffer.batch():
+        fleet.create(3)
+    assert len(flushed) == 1 and len(flushed[0]) == 3
+    fleet.broadcast('up')
+    assert len(flushed) == 2 and len(flushed[1]) == 3
+
+
+def test_failure_modes():
+    def fail(values):
+        raise RuntimeError(values)
+
+    action = Action(lambda machine: 1, Buffer(fail))
+    with pytest.raises(RuntimeError):
+        action(None)
+    assert len(action.buffer) == 0
+
+    action.buffer = Buffer(fail, failure='retain')
+    with pytest.raises(RuntimeError):
+        action(None)
+    assert len(action.buffer) == 1
+
+    action.buffer = Buffer(fail, failure='log')
+    action(None)
+    assert len(action.buffer) == 0
+    assert action.buffer.history[-1].failed
+
+    with pytest.raises(InvalidConfig):
+        Buffer(fail, failure='retry')
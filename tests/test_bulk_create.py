@@ -0,0 +1,89 @@
+import pytest
+
+from fluidstate import Buffer, InvalidConfig, StateChart
+from fluidstate.fleet import Fleet
+
+
+class Counter(StateChart):
+    __statechart__ = {
+        'initial': 'idle',
+        'states': [
+            {
+                'name': 'idle',
+                'transitions': [{'event': 'start', 'target': 'counting'}],
+                'on_entry': 'enter_idle',
+            },
+            {'name': 'counting'},
+        ],
+    }
+
+    def enter_idle(self):
+        self.entries += 1
+
+
+def test_bulk_create_shares_initial_state():
+    machines = Counter.bulk_create(3, entries=0)
+    assert len(machines) == 3
+    assert all(x.state is Counter.main.substates[0] for x in machines)
+    assert [x.entries for x in machines] == [1, 1, 1]
+    machines[0].trigger('start')
+    assert machines[0].state == 'counting'
+    assert machines[1].state == 'idle'
+
+
+def test_bulk_create_copies_mutable_values():
+    machines = Counter.bulk_create(3, run_entry=False, items=[], name='c')
+    machines[0].items.append(1)
+    assert [x.items for x in machines] == [[1], [], []]
+    assert machines[1].name is machines[2].name
+
+
+def test_bulk_create_flushes_buffered_entry_actions_once():
+    flushed = []
+
+    class Buffered(StateChart):
+        rows = Buffer(flushed.append)
+        __statechart__ = {
+            'initial': 'idle',
+            'states': [
+                {
+                    'name': 'idle',
+                    'on_entry': {'content': 'row', 'buffer': 'rows'},
+                },
+                {'name': 'done'},
+            ],
+        }
+
+        def row(self):
+            return id(self)
+
+    Buffered.bulk_create(4)
+    assert len(flushed) == 1 and len(flushed[0]) == 4
+
+
+def test_bulk_create_can_skip_entry_actions():
+    machines = Counter.bulk_create(2, initial='counting', run_entry=False)
+    assert all(x.state == 'counting' for x in machines)
+    machines = Counter.bulk_create(2, run_entry=False, entries=0)
+    assert [x.entries for x in machines] == [0, 0]
+
+
+def test_bulk_create_accepts_callable_initial():
+    machines = Counter.bulk_create(
+        2, initial=lambda x: 'counting', run_entry=False
+    )
+    assert machines[1].state == 'counting'
+
+
+def test_bulk_create_requires_states():
+    with pytest.raises(InvalidConfig):
+        StateChart.bulk_create(1)
+
+
+def test_fleet_registers_created_machines():
+    fleet = Fleet(Counter)
+    keys = fleet.create(4, entries=0)
+    assert keys == [0, 1, 2, 3]
+    assert fleet.count('idle') == 4
+    fleet[2].trigger('start')
+    assert fleet.members('counting') == [2]
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from fluidstate import StateChart
+from fluidstate.timers import TimerWheel, VirtualClock
+
+
+class Cart(StateChart):
+    __timers__ = TimerWheel(clock=VirtualClock())
+    __statechart__ = {
+        'initial': 'shopping',
+        'states': [
+            {
+                'name': 'shopping',
+                'transitions': [
+                    {
+                        'event': 'add',
+                        'target': 'shopping',
+                        'action': 'add_item',
+                    },
+                    {'event': 'checkout', 'target': 'paid'},
+                ],
+            },
+            {'name': 'paid', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.items = []
+        self.total = 0
+        super().__init__()
+
+    def add_item(self, item, price):
+        self.items.append(item)
+        self.total += price
+
+
+def test_clone_shares_current_state():
+    cart = Cart()
+    cart.trigger('add', 'apple', 2)
+    copy = cart.clone()
+    assert copy.state is cart.state
+    assert copy.items == ['apple']
+    assert copy.total == 2
+
+
+def test_clone_changes_do_not_affect_original():
+    cart = Cart()
+    cart.trigger('add', 'apple', 2)
+    copy = cart.clone()
+    copy.trigger('add', 'pear', 3)
+    copy.trigger('checkout')
+    assert copy.state == 'paid'
+    assert copy.items == ['apple', 'pear']
+    assert cart.state == 'shopping'
+    assert cart.items == ['apple']
+    assert cart.total == 2
+
+
+def test_original_changes_do_not_affect_clone():
+    cart = Cart()
+    cart.trigger('add', 'apple', 2)
+    copy = cart.clone()
+    cart.trigger('add', 'pear', 3)
+    cart.items.append('plum')
+    assert copy.items == ['apple']
+    assert copy.total == 2
+
+
+def test_clone_copies_other_containers():
+    cart = Cart()
+    cart.counts = defaultdict(int)
+    cart.counts['apple'] += 1
+    copy = cart.clone()
+    copy.counts['spec'] += 1
+    assert cart.counts == {'apple': 1}
+    assert copy.counts == {'apple': 1, 'spec': 1}
+    assert isinstance(copy.counts, defaultdict)
+
+
+def test_clone_of_clone_copies_unaccessed_state():
+    cart = Cart()
+    first = cart.clone()
+    second = first.clone()
+    second.items.append('plum')
+    assert first.items == []
+    assert cart.items == []
+
+
+def test_clone_does_not_carry_observers_or_timers():
+    seen = []
+    cart = Cart()
+    cart.subscribe(lambda machine, event: seen.append(event))
+    cart.send_after('checkout', 1)
+    copy = cart.clone()
+    copy.trigger('add', 'fig', 1)
+    assert seen == []
+    copy.send_after('checkout', 1)
+    copy.discard()
+    Cart.__timers__.clock.advance(2)
+    Cart.__timers__.poll()
+    assert cart.state == 'paid'
+    assert copy.state == 'shopping'
@@ -0,0 +1,66 @@
+import pytest
+
+from fluidstate import InvalidConfig, Result, StateChart
+
+
+class Sensor(StateChart):
+    __coalesce__ = {
+        'tick': 'drop',
+        'reading': 'last',
+        'heartbeat': ('count', 'beats'),
+    }
+    __statechart__ = {
+        'initial': 'watching',
+        'states': [
+            {
+                'name': 'watching',
+                'transitions': [
+                    {'event': 'tick', 'target': '', 'action': 'record'},
+                    {'event': 'reading', 'target': '', 'action': 'record'},
+                    {'event': 'heartbeat', 'target': '', 'action': 'record'},
+                    {'event': 'stop', 'target': 'stopped'},
+                ],
+            },
+            {'name': 'stopped', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.log = []
+        super().__init__()
+
+    def record(self, *args, **kwargs):
+        self.log.append((args, kwargs))
+
+
+def test_consecutive_duplicates_merged():
+    sensor = Sensor()
+    for n in range(3):
+        sensor.post('tick', n)
+    sensor.post('reading', value=1)
+    sensor.post('reading', value=2)
+    sensor.post('tick', 9)
+    assert sensor.pending == 3
+    assert sensor.process() == [Result.APPLIED] * 3
+    assert sensor.log == [((0,), {}), ((), {'value': 2}), ((9,), {})]
+    assert sensor.coalesced == {'tick': 2, 'reading': 1}
+    assert sensor.pending == 0
+
+
+def test_count_passed_as_keyword():
+    sensor = Sensor()
+    sensor.post('heartbeat')
+    sensor.post(Sensor.event_ids['heartbeat'])
+    sensor.post('stop')
+    sensor.post('heartbeat')
+    assert sensor.process() == [Result.APPLIED, Result.APPLIED, Result.FINAL]
+    assert sensor.log == [((), {'beats': 2})]
+    assert sensor.coalesced == {'heartbeat': 1}
+
+
+def test_invalid_policy():
+    with pytest.raises(InvalidConfig):
+
+        class Invalid(StateChart):
+            __coalesce__ = {'tick': 'first'}
+            __statechart__ = {'states': [{'name': 'a'}, {'name': 'b'}]}
@@ -0,0 +1,81 @@
+import pytest
+
+from fluidstate import InvalidTransition, Result, StateChart
+from fluidstate.fleet import Fleet
+from fluidstate.journal import Journal
+
+
+class Light(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'turn_on', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [{'event': 'turn_off', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def test_events_are_interned_at_class_creation():
+    assert Light.events == ('turn_on', 'turn_off')
+    assert Light.event_ids == {'turn_on': 0, 'turn_off': 1}
+    assert Light.event_table[id(Light.main.substates[0])] == {
+        0: Light.transition_table[id(Light.main.substates[0])]['turn_on']
+    }
+
+
+def test_trigger_accepts_event_ids():
+    seen = []
+    light = Light()
+    light.subscribe(lambda machine, event: seen.append(event))
+    light.trigger(Light.event_ids['turn_on'])
+    assert light.state == 'on'
+    assert light.try_trigger(0) == Result.NO_TRANSITION
+    with pytest.raises(InvalidTransition):
+        light.trigger(0)
+    assert light.trigger_many([1, 'turn_on']) == [Result.APPLIED] * 2
+    assert seen == ['turn_on', 'turn_off', 'turn_on']
+
+
+def test_ids_outside_vocabulary_match_nothing():
+    light = Light()
+    for event in (-1, -2, 2):
+        assert light.try_trigger(event) == Result.NO_TRANSITION
+        assert light.get_transitions(event) == ()
+    assert light.state == 'off'
+    assert light.fast_forward([-2, 5]) == 0
+    assert light.fast_forward([-2, 5], guards=False) == 0
+    fleet = Fleet(Light)
+    fleet.create(2)
+    assert fleet.eligible(-2) == []
+    assert light.get_transitions(1) == light.get_transitions('turn_off')
+
+
+def test_fast_forward_accepts_event_ids():
+    light = Light()
+    assert light.fast_forward([0, 1, 0]) == 3
+    assert light.state == 'on'
+    assert light.fast_forward([1], guards=False) == 1
+    assert light.state == 'off'
+
+
+def test_fleet_broadcasts_event_ids():
+    fleet = Fleet(Light)
+    fleet.create(3)
+    assert set(fleet.broadcast(0).values()) == {Result.APPLIED}
+    assert fleet.count('on') == 3
+    assert fleet.eligible(0) == []
+
+
+def test_journal_records_event_ids(tmp_path):
+    with Journal(str(tmp_path), Light) as journal:
+        journal.record(7, 0)
+        journal.record(7, 'turn_off')
+        assert [x.event for x in journal] == [0, 1]
+        machines = journal.replay()
+    assert machines[7].state == 'off'
@@ -0,0 +1,112 @@
+import pytest
+
+from fluidstate import InvalidConfig, StateChart
+from fluidstate.explore import Explorer
+
+
+class Order(StateChart):
+    __statechart__ = {
+        'initial': 'created',
+        'states': [
+            {
+                'name': 'created',
+                'transitions': [
+                    {'event': 'pay', 'target': 'paid', 'cond': 'funded'},
+                    {'event': 'cancel', 'target': 'canceled'},
+                ],
+            },
+            {
+                'name': 'paid',
+                'transitions': [
+                    {'event': 'ship', 'target': 'shipping', 'cond': 'cleared'},
+                    {'event': 'ship', 'target': 'held', 'cond': 'flagged'},
+                ],
+            },
+            {
+                'name': 'shipping',
+                'transitions': [{'event': '', 'target': 'delivered'}],
+            },
+            {'name': 'held'},
+            {'name': 'delivered', 'type': 'final'},
+            {'name': 'canceled', 'type': 'final'},
+            {'name': 'archived'},
+        ],
+    }
+
+
+def test_explore_finds_reachable_states():
+    result = Explorer(Order).explore()
+    assert set(result.reachable) == {
+        'main.created',
+        'main.paid',
+        'main.shipping',
+        'main.held',
+        'main.delivered',
+        'main.canceled',
+    }
+    assert result.chain == 1
+    assert result.cycles == ()
+
+
+def test_explore_reports_counterexamples():
+    result = Explorer(Order).explore()
+    assert [tuple(x) for x in result.deadlocks] == [
+        ('main.held', ('pay', 'ship'))
+    ]
+    assert [tuple(x) for x in result.forks] == [('main.paid', ('pay', 'ship'))]
+
+
+def test_explore_applies_guard_abstraction():
+    result = Explorer(Order, guards={'funded': (False,)}).explore()
+    assert set(result.reachable) == {'main.created', 'main.canceled'}
+    result = Explorer(Order, guards={'flagged': (False,)}).explore()
+    assert result.forks == ()
+    assert result.deadlocks == ()
+
+
+def test_trace_returns_shortest_events():
+    explorer = Explorer(Order)
+    assert explorer.trace('delivered').events == ('pay', 'ship')
+    assert explorer.trace('canceled').events == ('cancel',)
+    assert explorer.trace('archived') is None
+
+
+def test_explore_finds_eventless_cycles():
+    class Looping(StateChart):
+        __statechart__ = {
+            'initial': 'ping',
+            'states': [
+                {
+                    'name': 'ping',
+                    'transitions': [
+                        {'event': '', 'target': 'pong', 'cond': 'busy'}
+                    ],
+                },
+                {
+                    'name': 'pong',
+                    'transitions': [{'event': '', 'target': 'ping'}],
+                },
+            ],
+        }
+
+    result = Explorer(Looping).explore()
+    assert [x.state for x in result.cycles] == ['main.ping']
+    assert Explorer(Looping, guards={'busy': (False,)}).explore().cycles == ()
+
+
+def test_explore_expands_frontier_on_process_pool():
+    local = Explorer(Order).explore()
+    pooled = Explorer(Order, processes=2, batch=1).explore()
+    assert pooled == local
+
+
+def test_explore_requires_named_initial_state():
+    class Machine(StateChart):
+        __statechart__ = {
+            'initial': lambda x: 'off',
+            'states': [{'name': 'off'}, {'name': 'on'}],
+        }
+
+    with pytest.raises(InvalidConfig):
+        Explorer(Machine)
+    assert Explorer(Machine, initial='on').explore().reachable == ('main.on',)
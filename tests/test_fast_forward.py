@@ -0,0 +1,143 @@
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.fleet import Fleet
+from fluidstate.journal import Journal
+from fluidstate.timers import TimerWheel, VirtualClock
+
+
+class Order(StateChart):
+    __statechart__ = {
+        'initial': 'created',
+        'states': [
+            {
+                'name': 'created',
+                'transitions': [
+                    {'event': 'pay', 'target': 'paid', 'cond': 'funded'},
+                    {'event': 'cancel', 'target': 'canceled'},
+                ],
+                'on_exit': 'record',
+            },
+            {
+                'name': 'paid',
+                'transitions': [
+                    {'event': 'ship', 'target': 'shipping', 'action': 'record'}
+                ],
+                'on_entry': 'record',
+            },
+            {
+                'name': 'shipping',
+                'transitions': [{'event': '', 'target': 'delivered'}],
+            },
+            {'name': 'delivered', 'type': 'final'},
+            {'name': 'canceled', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self, funded=True):
+        self.funded = funded
+        self.effects = 0
+        super().__init__()
+
+    def record(self):
+        self.effects += 1
+
+
+@pytest.mark.parametrize('guards', [True, False])
+def test_fast_forward_skips_actions(guards):
+    order = Order()
+    applied = order.fast_forward(['ship', 'pay', 'ship', 'cancel'], guards)
+    assert applied == 2
+    assert order.state == 'delivered'
+    assert order.effects == 0
+
+
+def test_fast_forward_evaluates_guards():
+    order = Order(funded=False)
+    assert order.fast_forward(['pay']) == 0
+    assert order.state == 'created'
+    assert order.fast_forward(['pay'], guards=False) == 1
+    assert order.state == 'paid'
+
+
+def test_fast_forward_without_guards_decides_between_transitions():
+    class Review(StateChart):
+        __statechart__ = {
+            'initial': 'pending',
+            'states': [
+                {
+                    'name': 'pending',
+                    'transitions': [
+                        {
+                            'event': 'decide',
+                            'target': 'approved',
+                            'cond': 'ok',
+                        },
+                        {'event': 'decide', 'target': 'rejected'},
+                    ],
+                },
+                {'name': 'approved', 'type': 'final'},
+                {'name': 'rejected', 'type': 'final'},
+            ],
+        }
+        __selection__ = 'first'
+        ok = False
+
+    assert 'decide' not in Review.jump_table[id(Review.main.substates[0])]
+    live = Review()
+    live.trigger('decide')
+    review = Review()
+    assert review.fast_forward(['decide'], guards=False) == 1
+    assert review.state == live.state == 'rejected'
+
+
+def test_fleet_fast_forward_updates_index():
+    fleet = Fleet(Order)
+    for _ in range(3):
+        fleet.add(Order())
+    records = [(0, 'pay'), (1, 'cancel'), (0, 'ship'), (2, 'pay')]
+    assert fleet.fast_forward(records) == 4
+    assert fleet.count('delivered') == 1
+    assert fleet.count('canceled') == 1
+    assert fleet.eligible('ship') == [2]
+
+
+def test_journal_replays_without_actions(tmp_path):
+    with Journal(str(tmp_path), Order) as journal:
+        for event in ('pay', 'ship'):
+            journal.record(7, event)
+        journal.record(8, 'cancel')
+        machines = journal.replay(actions=False)
+    assert machines[7].state == 'delivered'
+    assert machines[7].effects == 0
+    assert machines[8].state == 'canceled'
+
+
+@pytest.mark.parametrize('guards', [True, False])
+def test_fast_forward_cancels_timers_of_states_left(guards):
+    class Timed(StateChart):
+        __timers__ = TimerWheel(clock=VirtualClock())
+        __statechart__ = {
+            'initial': 'a',
+            'states': [
+                {
+                    'name': 'a',
+                    'transitions': [
+                        {'event': 'tick', 'target': 'b', 'after': 1},
+                        {'event': 'skip', 'target': 'c'},
+                    ],
+                },
+                {'name': 'b'},
+                {
+                    'name': 'c',
+                    'transitions': [{'event': 'tick', 'target': 'd'}],
+                },
+                {'name': 'd'},
+            ],
+        }
+
+    machine = Timed()
+    assert machine.fast_forward(['skip'], guards) == 1
+    Timed.__timers__.clock.advance(2)
+    Timed.__timers__.poll()
+    assert machine.state == 'c'
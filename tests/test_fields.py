@@ -0,0 +1,102 @@
+import pytest
+
+from fluidstate import Field, InvalidConfig, StateChart
+from fluidstate.fleet import Fleet
+
+
+class Job(StateChart):
+    __fields__ = (
+        ('retries', int, 0),
+        ('progress', float, 0.0),
+        Field('tags', list, []),
+    )
+    __statechart__ = {
+        'initial': 'queued',
+        'states': [
+            {
+                'name': 'queued',
+                'transitions': [
+                    {
+                        'event': 'fail',
+                        'target': 'queued',
+                        'cond': 'retries < 2',
+                        'action': 'retry',
+                    },
+                    {
+                        'event': 'fail',
+                        'target': 'dead',
+                        'cond': 'retries >= 2',
+                    },
+                ],
+            },
+            {'name': 'dead', 'type': 'final'},
+        ],
+    }
+
+    def retry(self):
+        self.retries += 1
+
+
+def test_fields_are_slotted_with_defaults():
+    job = Job()
+    assert Job.__slots__ == ('retries', 'progress', 'tags')
+    assert [x.name for x in Job.fields] == ['retries', 'progress', 'tags']
+    assert (job.retries, job.progress, job.tags) == (0, 0.0, [])
+    assert 'retries' not in job.__dict__
+    assert job.tags is not Job().tags
+
+
+def test_fields_are_read_by_guards_and_actions():
+    job = Job()
+    for _ in range(3):
+        job.trigger('fail')
+    assert job.state == 'dead'
+    assert job.retries == 2
+
+
+def test_fields_set_before_init_are_kept():
+    class Retrying(Job):
+        def __init__(self):
+            self.retries = 5
+            super().__init__()
+
+    assert Retrying().retries == 5
+    assert Retrying.fields == Job.fields
+
+
+def test_bulk_create_and_clone_copy_fields():
+    jobs = Job.bulk_create(2, retries=1)
+    assert [x.retries for x in jobs] == [1, 1]
+    assert jobs[0].tags is not jobs[1].tags
+    clone = jobs[0].clone()
+    clone.retries += 1
+    clone.tags.append('copy')
+    assert jobs[0].retries == 1
+    assert jobs[0].tags == []
+
+
+def test_fleet_exports_fields_as_columns():
+    fleet = Fleet(Job)
+    fleet.create(3)
+    fleet.assign('progress', [0.5, 0.25, 1.0])
+    assert fleet[1].progress == 0.25
+    column = fleet.column('progress')
+    assert column.typecode == 'd'
+    assert list(column) == [0.5, 0.25, 1.0]
+    assert fleet.column('retries').itemsize == 8
+    with pytest.raises(InvalidConfig):
+        fleet.column('tags')
+    with pytest.raises(InvalidConfig):
+        fleet.assign('retries', [1])
+
+
+def test_field_default_must_match_type():
+    with pytest.raises(InvalidConfig):
+
+        class Machine(StateChart):
+            __fields__ = (('retries', int, 'none'),)
+
+
+def test_field_names_cannot_shadow_state_checks():
+    with pytest.raises(InvalidConfig):
+        Field.create(('is_open', bool, False))
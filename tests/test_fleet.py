@@ -0,0 +1,125 @@
+import pytest
+
+from fluidstate import InvalidConfig, Result, StateChart
+from fluidstate.fleet import Fleet
+
+
+class Job(StateChart):
+    __statechart__ = {
+        'initial': 'queued',
+        'states': [
+            {
+                'name': 'queued',
+                'transitions': [
+                    {'event': 'start', 'target': 'running'},
+                    {'event': 'cancel', 'target': 'canceled'},
+                ],
+            },
+            {
+                'name': 'running',
+                'transitions': [
+                    {'event': 'finish', 'target': 'done'},
+                    {'event': 'cancel', 'target': 'canceled', 'cond': 'soft'},
+                ],
+            },
+            {'name': 'done', 'type': 'final'},
+            {'name': 'canceled', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self, soft=True):
+        self.soft = soft
+        super().__init__()
+
+
+@pytest.fixture
+def fleet():
+    fleet = Fleet(Job)
+    for _ in range(3):
+        fleet.add(Job())
+    return fleet
+
+
+def test_broadcast_only_reaches_eligible_machines(fleet):
+    fleet[0].trigger('start')
+    assert fleet.eligible('finish') == [0]
+    assert fleet.broadcast('finish') == {0: Result.APPLIED}
+    assert fleet[0].state == 'done'
+    assert fleet.eligible('finish') == []
+    assert sorted(fleet.eligible('cancel')) == [1, 2]
+
+
+def test_index_follows_transitions_outside_the_fleet(fleet):
+    fleet[1].trigger('start')
+    fleet[2].trigger('cancel')
+    assert fleet.eligible('finish') == [1]
+    assert fleet.eligible('start') == [0]
+
+
+def test_broadcast_reports_failed_guards():
+    fleet = Fleet(Job)
+    key = fleet.add(Job(soft=False), key='hard')
+    fleet[key].trigger('start')
+    assert fleet.broadcast('cancel') == {'hard': Result.GUARD_FAILED}
+
+
+def test_removed_machines_are_not_tracked(fleet):
+    machine = fleet.remove(1)
+    machine.trigger('start')
+    assert 1 not in fleet
+    assert fleet.eligible('finish') == []
+
+
+def test_fleet_rejects_other_charts(fleet):
+    class Other(StateChart):
+        __statechart__ = {'states': ['open', 'closed']}
+
+    with pytest.raises(InvalidConfig):
+        fleet.add(Other())
+    with pytest.raises(InvalidConfig):
+        fleet.add(Job(), key=0)
+
+
+class Review(StateChart):
+    __statechart__ = {
+        'initial': 'waiting',
+        'states': [
+            {
+                'name': 'waiting',
+                'transitions': [{'event': 'assign', 'target': 'reading'}],
+            },
+            {
+                'name': 'open',
+                'initial': 'reading',
+                'states': [
+                    {
+                        'name': 'reading',
+                        'transitions': [
+                            {'event': 'analyze', 'target': 'analyzing'}
+                        ],
+                    },
+                    {'name': 'analyzing'},
+                ],
+            },
+        ],
+    }
+
+
+def test_occupancy_includes_descendant_states():
+    fleet = Fleet(Review)
+    for _ in range(4):
+        fleet.add(Review())
+    fleet[0].trigger('assign')
+    fleet[1].trigger('assign')
+    fleet[1].trigger('analyze')
+    assert fleet.count('waiting') == 2
+    assert fleet.count('analyzing') == 1
+    assert sorted(fleet.members('main.open')) == [0, 1]
+    assert fleet.members('analyzing') == [1]
+    assert fleet.occupancy() == {
+        'main': 4,
+        'main.waiting': 2,
+        'main.open': 2,
+        'main.open.reading': 1,
+        'main.open.analyzing': 1,
+    }
@@ -0,0 +1,103 @@
+import pytest
+
+from fluidstate import Guard, InvalidConfig, Result, StateChart
+
+
+class Payment(StateChart):
+    __statechart__ = {
+        'initial': 'pending',
+        'states': [
+            {
+                'name': 'pending',
+                'transitions': [
+                    {
+                        'event': 'retry',
+                        'target': 'pending',
+                        'cond': 'retries < 3 and not account.frozen',
+                        'action': 'count_retry',
+                    },
+                    {
+                        'event': 'pay',
+                        'target': 'paid',
+                        'cond': 'amount <= limit and currency in ("EUR", "USD")',
+                    },
+                ],
+            },
+            {'name': 'paid', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self):
+        self.retries = 0
+        self.limit = 100
+        self.account = Account()
+        super().__init__()
+
+    def count_retry(self):
+        self.retries += 1
+
+
+class Account:
+    frozen = False
+
+
+def test_expression_reads_extended_state():
+    payment = Payment()
+    results = [payment.try_trigger('retry') for _ in range(4)]
+    assert results[-1] == Result.GUARD_FAILED
+    assert payment.retries == 3
+
+
+def test_expression_reads_attributes_of_attributes():
+    payment = Payment()
+    payment.account.frozen = True
+    assert payment.try_trigger('retry') == Result.GUARD_FAILED
+
+
+def test_expression_reads_event_kwargs():
+    payment = Payment()
+    assert (
+        payment.try_trigger('pay', amount=150, currency='EUR')
+        == Result.GUARD_FAILED
+    )
+    assert (
+        payment.try_trigger('pay', amount=50, currency='GBP')
+        == Result.GUARD_FAILED
+    )
+    payment.trigger('pay', amount=50, currency='USD')
+    assert payment.state == 'paid'
+
+
+def test_expression_kwargs_shadow_extended_state():
+    guard = Guard('limit > 10')
+    payment = Payment()
+    assert guard(payment)
+    assert not guard(payment, limit=5)
+
+
+@pytest.mark.parametrize(
+    'source',
+    [
+        'retries <',
+        'open()',
+        'retries.__class__',
+        '_secret > 1',
+        '[x for x in retries]',
+        'retries + 1 > 2',
+    ],
+)
+def test_invalid_expression_fails_at_class_creation(source):
+    with pytest.raises(InvalidConfig):
+
+        class Machine(StateChart):
+            __statechart__ = {
+                'states': [
+                    {
+                        'name': 'idle',
+                        'transitions': [
+                            {'event': 'go', 'target': 'busy', 'cond': source}
+                        ],
+                    },
+                    {'name': 'busy'},
+                ]
+            }
@@ -0,0 +1,132 @@
+import pytest
+
+from fluidstate import Guard, GuardCache, GuardNotSatisfied, StateChart
+
+
+class Pilot(StateChart):
+    __statechart__ = {
+        'initial': 'grounded',
+        'states': [
+            {
+                'name': 'grounded',
+                'transitions': [
+                    {
+                        'event': 'launch',
+                        'target': 'flying',
+                        'cond': ['ready_to_fly', 'has_fuel'],
+                    },
+                    {
+                        'event': 'launch',
+                        'target': 'gliding',
+                        'cond': ['ready_to_fly', 'out_of_fuel'],
+                    },
+                ],
+            },
+            {'name': 'flying'},
+            {'name': 'gliding'},
+        ],
+    }
+
+    def __init__(self, fuel=10):
+        self.fuel = fuel
+        self.calls = 0
+        super().__init__()
+
+    def ready_to_fly(self):
+        self.calls += 1
+        return True
+
+    def has_fuel(self):
+        return self.fuel > 0
+
+    def out_of_fuel(self):
+        return self.fuel == 0
+
+
+def test_guard_evaluated_once_per_dispatch():
+    pilot = Pilot()
+    pilot.trigger('launch')
+    assert pilot.state == 'flying'
+    assert pilot.calls == 1
+
+
+def test_memo_does_not_leak_between_dispatches():
+    pilot = Pilot(fuel=0)
+    pilot.trigger('launch')
+    assert pilot.state == 'gliding'
+    other = Pilot(fuel=0)
+    other.trigger('launch')
+    assert other.calls == 1
+
+
+class Thermostat(StateChart):
+    __statechart__ = {
+        'initial': 'idle',
+        'states': [
+            {
+                'name': 'idle',
+                'transitions': [
+                    {
+                        'event': 'check',
+                        'target': 'idle',
+                        'cond': {
+                            'condition': 'too_cold',
+                            'pure': True,
+                            'depends': ['temperature'],
+                        },
+                    },
+                ],
+            },
+            {'name': 'heating'},
+        ],
+    }
+    __guard_cache_size__ = 2
+
+    def __init__(self, temperature):
+        self.temperature = temperature
+        self.evaluations = 0
+        super().__init__()
+
+    def too_cold(self):
+        self.evaluations += 1
+        return self.temperature < 18
+
+
+def test_pure_guard_cached_across_events():
+    Thermostat.guard_cache.cache_clear()
+    thermostat = Thermostat(temperature=10)
+    thermostat.trigger('check')
+    thermostat.trigger('check')
+    assert thermostat.evaluations == 1
+    info = Thermostat.guard_cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_pure_guard_keyed_by_dependencies():
+    Thermostat.guard_cache.cache_clear()
+    thermostat = Thermostat(temperature=10)
+    thermostat.trigger('check')
+    thermostat.temperature = 25
+    with pytest.raises(GuardNotSatisfied):
+        thermostat.trigger('check')
+    assert thermostat.evaluations == 2
+
+
+def test_pure_guard_cache_evicts_least_recently_used():
+    Thermostat.guard_cache.cache_clear()
+    thermostat = Thermostat(temperature=1)
+    for temperature in (1, 2, 1, 3):
+        thermostat.temperature = temperature
+        thermostat.trigger('check')
+    assert thermostat.evaluations == 3
+    assert len(Thermostat.guard_cache) == 2
+    thermostat.temperature = 2
+    thermostat.trigger('check')
+    assert thermostat.evaluations == 4
+
+
+def test_guard_cache_skips_unhashable_parameters():
+    cache = GuardCache(maxsize=4)
+    guard = Guard(lambda machine, values: bool(values), pure=True)
+    assert cache(guard, None, [1]) is True
+    assert cache.cache_info().currsize == 0
@@ -0,0 +1,222 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fluidstate import StateChart
+from fluidstate.journal import RECORD, Journal, Record
+
+
+class Switch(StateChart):
+    __statechart__ = {
+        'initial': 'off',
+        'states': [
+            {
+                'name': 'off',
+                'transitions': [{'event': 'toggle', 'target': 'on'}],
+            },
+            {
+                'name': 'on',
+                'transitions': [
+                    {'event': 'toggle', 'target': 'off'},
+                    {'event': 'dim', 'target': 'dimmed'},
+                ],
+            },
+            {
+                'name': 'dimmed',
+                'transitions': [{'event': 'toggle', 'target': 'off'}],
+            },
+        ],
+    }
+
+
+def get_regions():
+    class Regions(StateChart):
+        __statechart__ = {
+            'initial': 'start',
+            'states': [
+                {
+                    'name': 'start',
+                    'transitions': [
+                        {'event': 'left', 'target': 'west'},
+                        {'event': 'right', 'target': 'east'},
+                    ],
+                },
+                {
+                    'name': 'west',
+                    'states': lambda: [
+                        {
+                            'name': 'l1',
+                            'transitions': [{'event': 'eb', 'target': 'l2'}],
+                        },
+                        {'name': 'l2'},
+                    ],
+                    'transitions': [{'event': 'enter', 'target': 'l1'}],
+                },
+                {
+                    'name': 'east',
+                    'states': lambda: [
+                        {
+                            'name': 'r1',
+                            'transitions': [{'event': 'go', 'target': 'r2'}],
+                        },
+                        {'name': 'r2'},
+                    ],
+                    'transitions': [{'event': 'enter', 'target': 'r1'}],
+                },
+            ],
+        }
+
+    return Regions
+
+
+# record events of a lazy region in a process of its own
+WRITER = """
+import sys
+from test_journal import get_regions
+from fluidstate.journal import Journal
+Regions = get_regions()
+machine = Regions()
+with Journal(sys.argv[1], Regions) as journal:
+    journal.attach(machine, 0)
+    machine.trigger('left')
+    machine.trigger('enter')
+    machine.trigger('eb')
+"""
+
+
+def test_records_round_trip(tmp_path):
+    with Journal(str(tmp_path), Switch) as journal:
+        journal.append(1, 0, 10.0)
+        journal.extend([(2, 1, 11.0, 7), (1, 0, 12.0, -1)])
+        assert list(journal) == [
+            Record(1, 0, 10.0),
+            Record(2, 1, 11.0, 7),
+            Record(1, 0, 12.0),
+        ]
+
+
+def test_segments_rotate_by_size(tmp_path):
+    with Journal(
+        str(tmp_path),
+        Switch,
+        segment_size=RECORD.size * 10,
+        buffer_size=RECORD.size * 4,
+    ) as journal:
+        journal.extend((x, 0, float(x), -1) for x in range(25))
+    journal = Journal(str(tmp_path), Switch)
+    assert [os.path.getsize(x) for x in journal.segments()] == [
+        RECORD.size * 10,
+        RECORD.size * 10,
+        RECORD.size * 5,
+    ]
+    assert [x.machine for x in journal] == list(range(25))
+    journal.close()
+
+
+def test_torn_records_are_dropped(tmp_path):
+    with Journal(str(tmp_path), Switch) as journal:
+        journal.append(1, 0, 1.0)
+        path = journal.segments()[-1]
+    with open(path, 'ab') as file:
+        file.write(b'\x00' * 5)
+    with Journal(str(tmp_path), Switch) as journal:
+        journal.append(2, 0, 2.0)
+        assert [x.machine for x in journal] == [1, 2]
+
+
+def test_attached_machines_are_replayed(tmp_path):
+    machines = {0: Switch(), 1: Switch()}
+    with Journal(str(tmp_path), Switch) as journal:
+        for key, machine in machines.items():
+            journal.attach(machine, key)
+        machines[0].trigger('toggle')
+        machines[1].trigger('toggle')
+        machines[1].trigger('dim')
+        machines[0].trigger('toggle')
+        replayed = journal.replay()
+    assert {k: v.state.name for k, v in replayed.items()} == {
+        0: 'off',
+        1: 'dimmed',
+    }
+
+
+def test_attached_machines_record_events_of_lazy_regions(tmp_path):
+    class Lazy(StateChart):
+        __statechart__ = {
+            'initial': 'off',
+            'states': [
+                {
+                    'name': 'off',
+                    'transitions': [{'event': 'toggle', 'target': 'on'}],
+                },
+                {
+                    'name': 'on',
+                    'states': lambda: [
+                        {
+                            'name': 'low',
+                            'transitions': [
+                                {'event': 'deep', 'target': 'high'}
+                            ],
+                        },
+                        {'name': 'high'},
+                    ],
+                    'transitions': [{'event': 'dim', 'target': 'low'}],
+                },
+            ],
+        }
+
+    machine = Lazy()
+    with Journal(str(tmp_path), Lazy) as journal:
+        journal.attach(machine, 0)
+        machine.trigger('toggle')
+        machine.trigger('dim')
+        machine.trigger('deep')
+        events = [journal.events[x.event] for x in journal]
+    assert events == ['toggle', 'dim', 'deep']
+
+
+def test_failed_transitions_are_not_recorded(tmp_path):
+    class Faulty(StateChart):
+        __statechart__ = {
+            'initial': 'off',
+            'states': [
+                {
+                    'name': 'off',
+                    'transitions': [
+                        {'event': 'toggle', 'target': 'on'},
+                        {'event': 'break', 'target': 'on', 'action': 'fail'},
+                    ],
+                },
+                {'name': 'on', 'transitions': []},
+            ],
+        }
+
+        def fail(self):
+            raise RuntimeError('switch is broken')
+
+    machine = Faulty()
+    with Journal(str(tmp_path), Faulty) as journal:
+        journal.attach(machine, 0)
+        with pytest.raises(RuntimeError):
+            machine.trigger('break')
+        assert list(journal) == []
+
+
+def test_records_decoded_with_vocabulary_of_writer(tmp_path):
+    subprocess.run(
+        [sys.executable, '-c', WRITER, str(tmp_path)],
+        check=True,
+        cwd=os.path.dirname(__file__),
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)},
+    )
+    # the reader builds the other region first and gives its event the id
+    # the writer gave to eb
+    Regions = get_regions()
+    Regions().trigger('right')
+    journal = Journal(str(tmp_path), Regions)
+    assert journal.events[3] == 'eb' and Regions.events[3] == 'go'
+    assert journal.replay()[0].state == 'l2'
+    assert journal.replay(actions=False)[0].state == 'l2'
+    journal.close()
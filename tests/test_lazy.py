@@ -0,0 +1,137 @@
+import pytest
+
+from fluidstate import InvalidConfig, Result, StateChart
+from fluidstate.explore import Explorer
+from fluidstate.fleet import Fleet
+
+built = []
+
+ENGINE = [
+    {'name': 'idle', 'transitions': [{'event': 'run', 'target': 'running'}]},
+    {'name': 'running', 'transitions': [{'event': 'halt', 'target': 'idle'}]},
+]
+
+
+def engine():
+    built.append('engine')
+    return ENGINE
+
+
+def get_chart(states):
+    class Machine(StateChart):
+        __statechart__ = {
+            'initial': 'off',
+            'states': [
+                {
+                    'name': 'off',
+                    'transitions': [
+                        {'event': 'power', 'target': 'on'},
+                        {'event': 'start', 'target': 'idle'},
+                    ],
+                },
+                {
+                    'name': 'on',
+                    'states': states,
+                    'transitions': [{'event': 'stop', 'target': 'off'}],
+                },
+            ],
+        }
+
+    return Machine
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    built.clear()
+
+
+def test_substates_built_on_entry():
+    chart = get_chart(engine)
+    assert built == []
+    assert not chart.main.substates[1].loaded
+    assert chart.main.substates[1].type == 'compound'
+    assert 'run' not in chart.events
+
+    machine = chart()
+    machine.trigger('power')
+    assert built == ['engine']
+    assert machine.state == 'on'
+    assert [x.name for x in machine.state.substates] == ['idle', 'running']
+    assert 'run' in chart.events
+    assert not chart.lazy
+
+    chart().trigger('power')
+    assert built == ['engine']
+
+
+def test_targets_resolved_on_first_use():
+    chart = get_chart(f"{__name__}:ENGINE")
+    ids = dict(chart.event_ids)
+    machine = chart()
+    machine.trigger('start')
+    assert machine.state == 'idle'
+    machine.trigger('run')
+    assert machine.state == 'running'
+    assert machine.state.superstate.name == 'on'
+    assert {k: chart.event_ids[k] for k in ids} == ids
+
+
+def test_fast_forward_into_lazy_region():
+    chart = get_chart(engine)
+    machine = chart()
+    assert machine.fast_forward(['start', 'run'], guards=False) == 2
+    assert machine.state == 'running'
+
+
+def test_fleet_indexes_loaded_states():
+    chart = get_chart(engine)
+    fleet = Fleet(chart)
+    fleet.create(3)
+    fleet.broadcast('start')
+    assert fleet.count('on') == 3
+    fleet.broadcast('run')
+    assert fleet.occupancy()['main.on.running'] == 3
+
+
+def test_materialize():
+    chart = get_chart(engine)
+    chart.materialize()
+    assert built == ['engine']
+    assert not chart.report.unresolved
+    assert 'main.on.running' in Explorer(chart).explore().reachable
+
+
+def test_trusted_charts_load_eagerly():
+    class Trusted(StateChart):
+        __trusted__ = True
+        __statechart__ = {
+            'initial': 'idle',
+            'states': [
+                {'name': 'parked', 'transitions': []},
+                {'name': 'drive', 'states': engine},
+            ],
+        }
+
+    assert built == ['engine']
+    assert Trusted.main.substates[1].loaded
+
+
+def test_loader_must_build_two_states():
+    chart = get_chart(lambda: ENGINE[:1])
+    with pytest.raises(InvalidConfig):
+        chart.materialize()
+
+
+def test_subclasses_compile_regions_loaded_by_others():
+    chart = get_chart(engine)
+
+    class Tuned(chart):
+        pass
+
+    Tuned().trigger('power')
+    machine = chart()
+    machine.trigger('start')
+    assert machine.try_trigger('run') == Result.APPLIED
+    assert machine.state == 'running'
+    assert 'run' in chart.events and 'run' in Tuned.events
+    assert built == ['engine']
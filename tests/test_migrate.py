@@ -0,0 +1,110 @@
+import pytest
+
+from fluidstate import InvalidConfig, StateChart
+from fluidstate.fleet import Fleet
+from fluidstate.migrate import Migrator
+
+
+class OrderV1(StateChart):
+    __statechart__ = {
+        'initial': 'open',
+        'states': [
+            {
+                'name': 'open',
+                'transitions': [{'event': 'pay', 'target': 'paid'}],
+            },
+            {
+                'name': 'paid',
+                'transitions': [{'event': 'ship', 'target': 'held'}],
+            },
+            {
+                'name': 'held',
+                'transitions': [{'event': 'release', 'target': 'open'}],
+            },
+        ],
+    }
+
+
+class OrderV2(StateChart):
+    __statechart__ = {
+        'initial': 'open',
+        'states': [
+            {
+                'name': 'open',
+                'transitions': [{'event': 'pay', 'target': 'paid'}],
+            },
+            {
+                'name': 'paid',
+                'transitions': [{'event': 'ship', 'target': 'shipped'}],
+                'on_entry': 'notify',
+            },
+            {'name': 'shipped', 'type': 'final'},
+        ],
+    }
+
+    def notify(self):
+        self.notified = True
+
+
+def get_machines():
+    machines = [OrderV1() for _ in range(3)]
+    machines[1].trigger('pay')
+    machines[2].trigger('pay')
+    machines[2].trigger('ship')
+    for machine in machines:
+        machine.total = 10
+    return machines
+
+
+def test_states_matched_by_path():
+    machines = get_machines()
+    migration = Migrator(OrderV1, OrderV2).migrate(machines)
+    assert migration.migrated == 2
+    assert migration.missing == {2: machines[2]}
+    assert migration.unmapped == ('main.held',)
+    assert isinstance(machines[1], OrderV2)
+    assert machines[1].state is OrderV2.main.substates[1]
+    assert machines[1].total == 10
+    assert not hasattr(machines[1], 'notified')
+    machines[1].trigger('ship')
+    assert machines[1].state == 'shipped'
+    assert isinstance(machines[2], OrderV1)
+
+
+def test_mapping_and_entry_actions():
+    machines = get_machines()
+    migration = Migrator(
+        OrderV1, OrderV2, {'held': 'paid', 'open': None}
+    ).migrate(machines, run_entry=True)
+    assert migration.migrated == 2
+    assert list(migration.missing) == [0]
+    assert machines[2].state == 'paid'
+    assert machines[1].notified and machines[2].notified
+
+
+def test_fleet_migration():
+    fleet = Fleet(OrderV1)
+    fleet.extend(get_machines())
+    migration = fleet.migrate(OrderV2)
+    assert list(migration.missing) == [2]
+    assert fleet.chart is OrderV2
+    assert len(fleet) == 2
+    assert fleet.occupancy()['main.paid'] == 1
+    fleet.broadcast('ship')
+    assert fleet.count('shipped') == 1
+    assert fleet.eligible('pay') == [0]
+
+
+def test_layouts_must_match():
+    class Counted(StateChart):
+        __fields__ = (('total', int),)
+        __statechart__ = {
+            'initial': 'open',
+            'states': [
+                {'name': 'open', 'transitions': []},
+                {'name': 'paid', 'transitions': []},
+            ],
+        }
+
+    with pytest.raises(InvalidConfig):
+        Migrator(OrderV1, Counted)
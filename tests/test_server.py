@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from fluidstate import Result, StateChart
+from fluidstate.server import (
+    ERROR,
+    HEADER,
+    INDEX,
+    NAME,
+    REQUEST,
+    RESPONSE,
+    TRIGGER,
+    Client,
+    RemoteError,
+    Server,
+    _pack,
+)
+
+
+class Door(StateChart):
+    __statechart__ = {
+        'initial': 'closed',
+        'states': [
+            {
+                'name': 'closed',
+                'transitions': [
+                    {'event': 'open', 'target': 'opened', 'action': 'log'}
+                ],
+            },
+            {
+                'name': 'opened',
+                'transitions': [{'event': 'close', 'target': 'closed'}],
+            },
+        ],
+    }
+
+    def log(self, by=None):
+        self.by = by
+
+
+def run(test):
+    async def serve(**settings):
+        server = Server(Door)
+        await server.start(**settings)
+        return server
+
+    return asyncio.run(test(serve))
+
+
+def test_requests_over_tcp():
+    async def test(serve):
+        server = await serve()
+        port = server.address[1]
+        async with Client(port=port, size=2) as client:
+            assert await client.create('Door', 'front') == 'main.closed'
+            assert (
+                await client.trigger('Door', 'front', 'open', by='ann')
+                == Result.APPLIED
+            )
+            assert server.machines[('Door', 'front')].by == 'ann'
+            assert (
+                await client.trigger('Door', 'front', 'open')
+                == Result.NO_TRANSITION
+            )
+            assert await client.state('Door', 'front') == 'main.opened'
+            close = Door.event_ids['close']
+            assert await client.trigger('Door', 'front', close) == 0
+            with pytest.raises(RemoteError):
+                await client.trigger('Door', 'back', 'open')
+            with pytest.raises(RemoteError):
+                await client.create('Window', 'back')
+            assert await client.remove('Door', 'front') == 'main.closed'
+        await server.close()
+
+    run(test)
+
+
+def test_pipelined_events_over_unix_socket(tmp_path):
+    async def test(serve):
+        path = str(tmp_path / 'charts.sock')
+        server = await serve(path=path)
+        async with Client(path) as client:
+            await client.create('Door', 'front')
+            results = await client.trigger_many(
+                'Door', 'front', ['open', 'close', ('open', {'by': 'bo'})]
+            )
+            assert results == [Result.APPLIED] * 3
+            assert server.machines[('Door', 'front')].by == 'bo'
+        await server.close()
+
+    run(test)
+
+
+def test_batch_orders_events_per_machine():
+    server = Server(Door)
+    server.add('front', Door())
+    server.add('back', Door())
+    requests = [
+        ('front', 'open'),
+        ('back', 'close'),
+        ('front', 'close'),
+        ('front', 'close'),
+    ]
+    frames = [
+        REQUEST.pack(TRIGGER, rid)
+        + _pack('Door', key)
+        + INDEX.pack(NAME, 0)
+        + _pack(event)
+        for rid, (key, event) in enumerate(requests)
+    ]
+    responses = {}
+    for frame in server.process(frames):
+        rid, status = RESPONSE.unpack_from(frame, HEADER.size)
+        responses[rid] = Result(status)
+    assert responses == {
+        0: Result.APPLIED,
+        1: Result.NO_TRANSITION,
+        2: Result.APPLIED,
+        3: Result.NO_TRANSITION,
+    }
+
+
+def test_malformed_frames():
+    server = Server(Door)
+    with pytest.raises(RemoteError):
+        server.process([b'\x02\x00'])
+    (response,) = server.process([REQUEST.pack(TRIGGER, 7) + b'\x00'])
+    assert RESPONSE.unpack_from(response, HEADER.size) == (7, ERROR)
+
+    async def test(serve):
+        server = await serve()
+        host, port = server.address
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(HEADER.pack(2) + b'\x02\x00')
+        assert await reader.read() == b''
+        writer.close()
+        async with Client(port=port) as client:
+            assert await client.create('Door', 'front') == 'main.closed'
+        await server.close()
+
+    run(test)
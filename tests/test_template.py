@@ -0,0 +1,102 @@
+import sys
+
+import pytest
+
+from fluidstate import InvalidConfig, State, StateChart, Template
+
+light = Template(
+    {
+        'name': 'light',
+        'initial': 'red',
+        'states': [
+            {
+                'name': 'red',
+                'transitions': [{'event': 'go', 'target': 'green'}],
+                'on_entry': 'count',
+            },
+            {
+                'name': 'green',
+                'transitions': [{'event': 'stop', 'target': 'red'}],
+            },
+        ],
+    }
+)
+
+
+class Junction(StateChart):
+    __statechart__ = {
+        'initial': 'red',
+        'states': [
+            {'template': light, 'name': 'north'},
+            {'template': light, 'name': 'south', 'initial': 'green'},
+            light,
+        ],
+    }
+
+    def __init__(self):
+        self.entries = 0
+        super().__init__()
+
+    def count(self):
+        self.entries += 1
+
+
+def test_embeddings_share_transitions_and_actions():
+    north, south, default = Junction.main.substates
+    assert [north.name, south.name, default.name] == [
+        'north',
+        'south',
+        'light',
+    ]
+    assert south.initial == 'green'
+    assert north.substates[0] is not south.substates[0]
+    assert north.substates[0].superstate is north
+    assert north.substates[0].transitions is south.substates[0].transitions
+    assert (
+        north.substates[0].transitions[0]
+        is light.prototype.substates[0].transitions[0]
+    )
+
+
+def test_embeddings_have_own_paths_and_routes():
+    machine = Junction()
+    assert machine.state.path == 'main.north.red'
+    machine.trigger('go')
+    assert machine.state.path == 'main.north.green'
+    machine.trigger('stop')
+    assert machine.state.path == 'main.north.red'
+    assert machine.entries == 2
+    assert machine.get_state('south').name == 'south'
+    paths = [x.path for x in Junction.main]
+    assert 'main.south.red' in paths
+    assert 'main.light.green' in paths
+
+
+def test_states_are_slotted():
+    state = Junction.main.substates[0]
+    assert not hasattr(state, '__dict__')
+    assert sys.getsizeof(state) < 200
+
+
+def test_template_must_be_detached():
+    with pytest.raises(InvalidConfig):
+        Template(Junction.main.substates[0])
+    assert isinstance(light.create('east'), State)
+
+
+def test_embedded_targets_resolve_within_embedding():
+    south = Junction.main.substates[1]
+    table = Junction.transition_table[id(south.substates[0])]
+    route = table['go'].routes[0]
+    assert route.target(south.substates[0]) is south.substates[1]
+
+
+def test_embeddings_share_compiled_rows():
+    north, south, default = Junction.main.substates
+    table = Junction.transition_table
+    assert table[id(north.substates[0])] is table[id(south.substates[0])]
+    assert table[id(north.substates[1])] is table[id(default.substates[1])]
+    events = Junction.event_table
+    assert events[id(north.substates[0])] is events[id(south.substates[0])]
+    jumps = Junction.jump_table
+    assert jumps[id(north.substates[0])] is jumps[id(south.substates[0])]
@@ -0,0 +1,130 @@
+import threading
+
+from fluidstate import StateChart
+from fluidstate.timers import TimerWheel, VirtualClock
+
+
+def test_wheel_fires_in_order_of_expiry():
+    clock = VirtualClock()
+    wheel = TimerWheel(resolution=0.1, slots=4, levels=2, clock=clock)
+    fired = []
+    for delay in (5.0, 0.1, 2.5, 0.7, 30.0):
+        wheel.schedule(delay, fired.append, delay)
+    assert len(wheel) == 5
+    clock.advance(3)
+    assert wheel.poll() == 3
+    assert fired == [0.1, 0.7, 2.5]
+    clock.advance(30)
+    wheel.poll()
+    assert fired == [0.1, 0.7, 2.5, 5.0, 30.0]
+    assert len(wheel) == 0
+
+
+def test_wheel_skips_cancelled_timers():
+    clock = VirtualClock()
+    wheel = TimerWheel(clock=clock)
+    fired = []
+    timer = wheel.schedule(1.0, fired.append, 'cancelled')
+    wheel.schedule(2.0, fired.append, 'kept')
+    timer.cancel()
+    assert len(wheel) == 1
+    wheel.run(5)
+    assert fired == ['kept']
+
+
+def test_wheel_schedules_from_callbacks_deterministically():
+    clock = VirtualClock()
+    wheel = TimerWheel(resolution=1, clock=clock)
+    fired = []
+
+    def repeat(count):
+        fired.append(wheel.now if not fired else fired[-1] + 10)
+        if count:
+            wheel.schedule(10, repeat, count - 1)
+
+    wheel.schedule(10, repeat, 3)
+    clock.advance(100)
+    wheel.poll()
+    assert fired == [100, 110, 120, 130]
+    assert len(wheel) == 0
+
+
+class StopLight(StateChart):
+    __timers__ = TimerWheel(clock=VirtualClock())
+    __statechart__ = {
+        'initial': 'red',
+        'states': [
+            {
+                'name': 'red',
+                'transitions': [
+                    {'event': 'turn_green', 'target': 'green', 'after': 5},
+                    {'event': 'fault', 'target': 'flashing'},
+                ],
+            },
+            {
+                'name': 'green',
+                'transitions': [
+                    {'event': 'turn_yellow', 'target': 'yellow', 'after': 4},
+                ],
+            },
+            {
+                'name': 'yellow',
+                'transitions': [
+                    {'event': 'turn_red', 'target': 'red', 'after': 1},
+                ],
+            },
+            {
+                'name': 'flashing',
+                'transitions': [{'event': 'reset', 'target': 'red'}],
+            },
+        ],
+    }
+
+
+def test_after_transitions_follow_the_clock():
+    wheel = StopLight.__timers__
+    light = StopLight()
+    wheel.clock.advance(5)
+    wheel.poll()
+    assert light.state == 'green'
+    wheel.clock.advance(4)
+    wheel.poll()
+    assert light.state == 'yellow'
+    wheel.clock.advance(1)
+    wheel.poll()
+    assert light.state == 'red'
+
+
+def test_timers_are_cancelled_when_state_is_exited():
+    class FaultyLight(StopLight):
+        __timers__ = TimerWheel(clock=VirtualClock())
+
+    wheel = FaultyLight.__timers__
+    light = FaultyLight()
+    light.send_after('fault', 1)
+    wheel.run(2)
+    assert light.state == 'flashing'
+    assert len(wheel) == 0
+    wheel.run(10)
+    assert light.state == 'flashing'
+
+
+def test_wheel_shared_across_threads():
+    wheel = TimerWheel(clock=VirtualClock())
+    fired = []
+
+    def work():
+        timers = [wheel.schedule(1, fired.append, 1) for _ in range(500)]
+        for timer in timers[::2]:
+            timer.cancel()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(wheel) == 8 * 250
+    wheel.clock.advance(2)
+    assert wheel.poll() == 8 * 250
+    assert len(fired) == 8 * 250
+    assert len(wheel) == 0
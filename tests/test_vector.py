@@ -0,0 +1,109 @@
+import pytest
+
+from fluidstate import InvalidConfig, StateChart
+
+np = pytest.importorskip('numpy')
+
+from fluidstate.vector import Vectorizer  # noqa: E402
+
+
+class Ticket(StateChart):
+    __statechart__ = {
+        'initial': 'open',
+        'states': [
+            {
+                'name': 'open',
+                'transitions': [
+                    {'event': 'assign', 'target': 'assigned'},
+                    {'event': 'close', 'target': 'closed'},
+                ],
+            },
+            {
+                'name': 'assigned',
+                'transitions': [
+                    {'event': 'resolve', 'target': 'resolved'},
+                    {
+                        'event': 'escalate',
+                        'target': 'escalated',
+                        'cond': 'severe',
+                    },
+                ],
+            },
+            {
+                'name': 'resolved',
+                'transitions': [{'event': '', 'target': 'closed'}],
+            },
+            {'name': 'escalated'},
+            {'name': 'closed', 'type': 'final'},
+        ],
+    }
+
+
+def ids(*names):
+    return [Ticket.event_ids[x] for x in names]
+
+
+def test_replay_matches_machines():
+    vectorizer = Vectorizer(Ticket)
+    entities = [1, 1, 1, 2, 3, 3]
+    events = ids('assign', 'resolve', 'assign', 'close', 'assign', 'close')
+    replay = vectorizer.replay(np.array(entities), np.array(events))
+    assert vectorizer.decode(replay.states) == [
+        'main.assigned',
+        'main.closed',
+        'main.closed',
+        'main.closed',
+        'main.assigned',
+        'main.assigned',
+    ]
+    assert replay.applied.tolist() == [True, True, False, True, True, False]
+    assert replay.entities.tolist() == [1, 2, 3]
+    assert vectorizer.decode(replay.finals) == [
+        'main.closed',
+        'main.closed',
+        'main.assigned',
+    ]
+    machine = Ticket()
+    machine.trigger_many(events[:3])
+    assert machine.state.path == 'main.closed'
+
+
+def test_replay_flags_guarded_rows():
+    vectorizer = Vectorizer(Ticket)
+    replay = vectorizer.replay([5, 5], ids('assign', 'escalate'))
+    assert replay.guarded.tolist() == [False, True]
+    assert vectorizer.decode(replay.finals) == ['main.escalated']
+
+
+def test_replay_requires_grouped_entities():
+    vectorizer = Vectorizer(Ticket)
+    with pytest.raises(InvalidConfig):
+        vectorizer.replay([1, 2, 1], ids('assign', 'assign', 'close'))
+    with pytest.raises(InvalidConfig):
+        vectorizer.replay([1], [99])
+    assert len(vectorizer.replay([], []).finals) == 0
+
+
+def test_replay_starts_after_eventless_initial_transitions():
+    class Booting(StateChart):
+        __statechart__ = {
+            'initial': 'boot',
+            'states': [
+                {
+                    'name': 'boot',
+                    'transitions': [{'event': '', 'target': 'idle'}],
+                },
+                {
+                    'name': 'idle',
+                    'transitions': [{'event': 'go', 'target': 'busy'}],
+                },
+                {'name': 'busy'},
+            ],
+        }
+
+    vectorizer = Vectorizer(Booting)
+    assert vectorizer.paths[vectorizer.initial] == Booting().state.path
+    go = Booting.event_ids['go']
+    replay = vectorizer.replay([1, 2], [go, go])
+    assert replay.applied.tolist() == [True, True]
+    assert vectorizer.decode(replay.finals) == ['main.busy'] * 2
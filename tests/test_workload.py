@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from fluidstate import InvalidConfig, StateChart
+from fluidstate.fleet import Fleet
+from fluidstate.workload import Workload, main
+
+
+class Door(StateChart):
+    __statechart__ = {
+        'initial': 'closed',
+        'states': [
+            {
+                'name': 'closed',
+                'transitions': [
+                    {'event': 'open', 'target': 'opened'},
+                    {'event': 'lock', 'target': 'locked'},
+                    {'event': 'break', 'target': 'broken'},
+                ],
+            },
+            {
+                'name': 'opened',
+                'transitions': [{'event': 'close', 'target': 'closed'}],
+            },
+            {
+                'name': 'locked',
+                'transitions': [{'event': 'unlock', 'target': 'closed'}],
+            },
+            {'name': 'broken', 'type': 'final'},
+        ],
+    }
+
+
+def test_next_event_walks_enabled_events():
+    workload = Workload(Door, weights={'break': 0}, seed=1)
+    door = Door()
+    assert workload.enabled(door) == ('open', 'lock', 'break')
+    for _ in range(50):
+        event = workload.next_event(door)
+        assert event in workload.enabled(door)
+        door.trigger(event)
+    assert door.state != 'broken'
+
+
+def test_next_event_adds_invalid_noise():
+    workload = Workload(Door, noise=1, seed=1)
+    door = Door()
+    assert workload.next_event(door) in ('close', 'unlock')
+
+
+def test_run_single_machine_counts_events():
+    stats = Workload(Door, noise=0.1, seed=2).run(Door(), events=500)
+    assert stats.events == 500
+    assert stats.applied + stats.rejected == 500
+    assert stats.rejected > 0
+    assert stats.restarted > 0
+    assert 0 < stats.p50 <= stats.p99 <= stats.p999
+    assert json.loads(stats.to_json())['events'] == 500
+
+
+def test_run_stops_machines_without_events():
+    stats = Workload(Door, restart=False, seed=3).run(Door(), events=1000)
+    assert stats.events < 1000
+    assert stats.restarted == 0
+
+
+def test_restart_requires_machines_with_events():
+    class Stuck(StateChart):
+        __statechart__ = {
+            'initial': 'done',
+            'states': [
+                {'name': 'done', 'type': 'final'},
+                {'name': 'other', 'type': 'final'},
+            ],
+        }
+
+    with pytest.raises(InvalidConfig):
+        Workload(Stuck, seed=4).run(Stuck(), events=10)
+
+
+def test_run_keeps_fleet_index():
+    fleet = Fleet(Door)
+    fleet.create(20)
+    stats = Workload(Door, seed=4).run(fleet, events=200)
+    assert stats.machines == 20
+    assert len(fleet) == 20
+    assert (
+        sum(
+            fleet.occupancy()[x]
+            for x in (
+                'main.closed',
+                'main.opened',
+                'main.locked',
+                'main.broken',
+            )
+        )
+        == 20
+    )
+
+
+def test_run_paces_to_rate():
+    stats = Workload(Door, seed=5).run(
+        Door.bulk_create(3), events=20, rate=400
+    )
+    assert stats.duration >= 19 / 400
+    with pytest.raises(InvalidConfig):
+        Workload(Door).run(Door())
+
+
+def test_main_writes_json(tmp_path):
+    path = tmp_path / 'run.json'
+    main(
+        [
+            'tests.test_workload:Door',
+            '--machines',
+            '5',
+            '--fleet',
+            '--events',
+            '100',
+            '--weight',
+            'break=0.1',
+            '--output',
+            str(path),
+        ]
+    )
+    assert json.loads(path.read_text())['machines'] == 5
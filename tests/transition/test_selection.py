@@ -0,0 +1,114 @@
+import pytest
+
+from fluidstate import ForkedTransition, InvalidConfig, StateChart
+
+CHART = {
+    'initial': 'pending',
+    'states': [
+        {
+            'name': 'pending',
+            'transitions': [
+                {'event': 'review', 'target': 'approved', 'cond': 'small'},
+                {'event': 'review', 'target': 'escalated', 'cond': 'large'},
+                {'event': 'review', 'target': 'rejected', 'cond': False},
+            ],
+        },
+        {'name': 'approved'},
+        {'name': 'escalated'},
+        {'name': 'rejected'},
+    ],
+}
+
+
+class Claim(StateChart):
+    __statechart__ = dict(CHART)
+
+    def __init__(self, amount):
+        self.amount = amount
+        self.checked = []
+        super().__init__()
+
+    def small(self):
+        self.checked.append('small')
+        return self.amount <= 1000
+
+    def large(self):
+        self.checked.append('large')
+        return self.amount > 100
+
+
+class FirstClaim(Claim):
+    __selection__ = 'first'
+
+
+def test_strict_selection_detects_forks():
+    claim = Claim(amount=500)
+    with pytest.raises(ForkedTransition):
+        claim.trigger('review')
+    assert claim.checked == ['small', 'large']
+
+
+def test_first_selection_stops_at_first_allowed():
+    claim = FirstClaim(amount=500)
+    claim.trigger('review')
+    assert claim.state == 'approved'
+    assert claim.checked == ['small']
+
+
+def test_first_selection_follows_document_order():
+    claim = FirstClaim(amount=5000)
+    claim.trigger('review')
+    assert claim.state == 'escalated'
+
+
+def test_single_candidates_are_exclusive():
+    table = Claim.transition_table[id(Claim.main.substates[0])]
+    assert table['review'].exclusive is False
+
+    class Door(StateChart):
+        __statechart__ = {
+            'initial': 'open',
+            'states': [
+                {
+                    'name': 'open',
+                    'transitions': [{'event': 'close', 'target': 'closed'}],
+                },
+                {'name': 'closed'},
+            ],
+        }
+
+    table = Door.transition_table[id(Door.main.substates[0])]
+    assert table['close'].exclusive is True
+
+
+def test_conflict_check_proves_constant_guards_exclusive():
+    class Checked(StateChart):
+        __conflict_check__ = True
+        __statechart__ = {
+            'initial': 'pending',
+            'states': [
+                {
+                    'name': 'pending',
+                    'transitions': [
+                        {'event': 'review', 'target': 'approved'},
+                        {'event': 'review', 'target': 'held', 'cond': False},
+                    ],
+                },
+                {'name': 'approved'},
+                {'name': 'held'},
+            ],
+        }
+
+    table = Checked.transition_table[id(Checked.main.substates[0])]
+    assert table['review'].exclusive is True
+    machine = Checked()
+    machine.trigger('review')
+    assert machine.state == 'approved'
+
+
+def test_invalid_selection_is_rejected():
+    with pytest.raises(InvalidConfig):
+
+        class Machine(StateChart):
+            __selection__ = 'random'
+            __statechart__ = {'states': ['open', 'closed']}
@@ -0,0 +1,75 @@
+import pytest
+
+from fluidstate import Result, StateChart
+
+
+class Door(StateChart):
+    __statechart__ = {
+        'initial': 'closed',
+        'states': [
+            {
+                'name': 'closed',
+                'transitions': [
+                    {'event': 'open', 'target': 'opened', 'cond': 'unlocked'},
+                    {'event': 'knock', 'target': 'closed'},
+                    {'event': 'knock', 'target': 'opened'},
+                    {'event': 'smash', 'target': 'broken'},
+                ],
+            },
+            {
+                'name': 'opened',
+                'transitions': [{'event': 'close', 'target': 'closed'}],
+            },
+            {'name': 'broken', 'type': 'final'},
+        ],
+    }
+
+    def __init__(self, locked=False):
+        self.locked = locked
+        super().__init__()
+
+    def unlocked(self):
+        return not self.locked
+
+
+def test_try_trigger_applies_transition():
+    door = Door()
+    assert door.try_trigger('open') == Result.APPLIED
+    assert door.state == 'opened'
+
+
+@pytest.mark.parametrize(
+    'event,result',
+    [
+        ('close', Result.NO_TRANSITION),
+        ('knock', Result.FORKED),
+    ],
+)
+def test_try_trigger_reports_outcome(event, result):
+    door = Door()
+    assert door.try_trigger(event) == result
+    assert door.state == 'closed'
+
+
+def test_try_trigger_reports_failed_guard():
+    door = Door(locked=True)
+    assert door.try_trigger('open') == Result.GUARD_FAILED
+    assert door.state == 'closed'
+
+
+def test_try_trigger_reports_final_state():
+    door = Door()
+    door.trigger('smash')
+    assert door.try_trigger('open') == Result.FINAL
+
+
+def test_trigger_many_reports_each_event():
+    door = Door()
+    results = door.trigger_many(['close', 'open', 'open', 'close'])
+    assert results == [
+        Result.NO_TRANSITION,
+        Result.APPLIED,
+        Result.NO_TRANSITION,
+        Result.APPLIED,
+    ]
+    assert door.state == 'closed'